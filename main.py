@@ -1,9 +1,13 @@
+import sys
 from graphviz import Digraph
 from antlr4 import *
 from modules.Semantic import SemanticAnalyzer
 from modules.ErrorListener import MyErrorListener
 from modules.TreeDirections import TreeDirections
 from modules.AssemblerConvertor import AssemblerConvertor
+from modules.Optimizer import Optimizer
+from modules.RegisterAllocator import RegisterAllocator
+from modules.GraphColoringAllocator import GraphColoringAllocator
 from yapl.YAPLParser import YAPLParser
 from yapl.YAPLLexer import YAPLLexer
 
@@ -22,48 +26,6 @@ def build_tree(dot, node, parser, parent=None):
         for child in node.children:
             build_tree(dot, child, parser, node)
 
-def recycle_temporals(code):
-    instructions = code.strip().split('\n')
-    
-    # Get lifespan of each temporary
-    lifespan = {}
-    for idx, line in enumerate(instructions):
-        tokens = line.split()
-        for token in tokens:
-            if token.startswith('t'):
-                if token not in lifespan:
-                    lifespan[token] = [idx, idx]
-                else:
-                    lifespan[token][1] = idx
-                    
-    # Recycle temporaries
-    recycled = {}
-    free_temps = set()
-    new_instructions = []
-    for idx, line in enumerate(instructions):
-        tokens = line.split()
-        
-        # Substitute temporaries based on recycled mapping
-        for token_idx, token in enumerate(tokens):
-            if token.startswith('t'):
-                if token in recycled:
-                    tokens[token_idx] = recycled[token]
-                elif free_temps:
-                    recycled_token = free_temps.pop()
-                    recycled[token] = recycled_token
-                    tokens[token_idx] = recycled_token
-                else:
-                    recycled[token] = token
-        
-        # Check for temporaries that are not used anymore and add to free_temps
-        for temp, (start, end) in lifespan.items():
-            if idx == end and temp in recycled and recycled[temp] == temp:
-                free_temps.add(temp)
-                
-        new_instructions.append(' '.join(tokens))
-    
-    return '\n'.join(new_instructions)
-
 def main():
     # # Set up the input and lexer
     # input_stream = FileStream(args.input_file)
@@ -118,14 +80,39 @@ def main():
     treedirectionsInfoPath = "./output/3D/hw.txt"
     my3D = TreeDirections(semantic_analyzer.symbol_table,treedirectionsInfoPath)
     my3D.visit(tree)
-
-    treedirectionsInfo = ""
-
-    with open(treedirectionsInfoPath, 'r') as file:
-        treedirectionsInfo = file.read()
+    my3D.dump()
 
     assemblerInfoPath = "./output/ASS/hw.s"
-    traductor = AssemblerConvertor(treedirectionsInfo,semantic_analyzer.symbol_table,assemblerInfoPath)
+    level = 1
+    if "-O0" in sys.argv:
+        level = 0
+    elif "-O2" in sys.argv:
+        level = 2
+
+    optimizer = Optimizer(my3D.triplets, level)
+    code = optimizer.optimize()
+    for func, callees in optimizer.inlined.items():
+        print(f"{func:30} inline: {', '.join(callees)}")
+    if len(optimizer.removed) > 0:
+        print(f"Sin usar (eliminado): {', '.join(optimizer.removed)}")
+    for func, info in optimizer.report.items():
+        print(f"{func:30} tripletas: {info['antes']:3} -> {info['despues']:3} lw/sw: {info['memoria'][0]:3} -> {info['memoria'][1]:3}")
+
+    # -O2: coloreo de grafo (mas lento, quita los moves); si no, linear scan
+    if level >= 2:
+        allocator = GraphColoringAllocator(code)
+    else:
+        allocator = RegisterAllocator(code)
+    code = allocator.allocate()
+    for func, info in allocator.report.items():
+        print(f"{func:30} temporales: {info['temporales']:3} registros: {info['registros']:2} spills: {info['spills']} moves eliminados: {info['moves']}")
+
+    traductor = AssemblerConvertor(code,semantic_analyzer.symbol_table,assemblerInfoPath)
+    print(f"Temporales vivos (max): {my3D.temp_allocator.high_water}")
+    print(f"Registros del convertidor (max): {traductor.registers.high_water}")
+    print(f"Llamadas directas (sin tabla virtual): {traductor.direct_calls}")
+    kinds = list(traductor.frames.values())
+    print(f"Funciones hoja: {kinds.count('frameless')} sin frame, {kinds.count('leaf')} sin guardar $ra")
 
 
 
@@ -3,278 +3,292 @@
 # Descripcion: Genera la traduccion de un archivo codigo de 3 direcciones a assembler MIPS
 # Ultima modificacion: 26/10/2023
 from modules.Symbol import Symbol, SymboTable
+from modules.Tripleta import Opcode, BINARY_OPS, UNARY_OPS, BRANCHES, parse_code
+from modules.Temporal import Temporal
+from modules.TempAllocator import TempAllocator
+from modules.Operand import StackSlot, GlobalSlot, Constant, NewObject, SelfRef, Register, int_constant, RESERVED, OBJECT_METHODS
+from modules.ClassHierarchy import ClassHierarchy
+from modules.ControlFlowGraph import split_functions
+from modules.Liveness import Liveness
+from modules.RegisterAllocator import RegisterAllocator
+
+# Operandos que ya estan en un registro: temporales tN o registros asignados
+REGISTERS = (Temporal, Register)
+
+
+def power_of_two(value):
+    # k si value == 2^k (None si no es potencia de 2)
+    if value is None or value <= 0 or value & (value - 1) != 0:
+        return None
+    return value.bit_length() - 1
+
+
+def division_magic(divisor):
+    # Numero magico y corrimiento para dividir entre divisor >= 2 con mult/mfhi
+    # (Hacker's Delight, division con signo entre constante)
+    two31 = 1 << 31
+    anc = two31 - 1 - two31 % divisor
+    p = 31
+    q1, r1 = divmod(two31, anc)
+    q2, r2 = divmod(two31, divisor)
+    while True:
+        p += 1
+        q1, r1 = 2 * q1, 2 * r1
+        if r1 >= anc:
+            q1, r1 = q1 + 1, r1 - anc
+        q2, r2 = 2 * q2, 2 * r2
+        if r2 >= divisor:
+            q2, r2 = q2 + 1, r2 - divisor
+        delta = divisor - r2
+        if not (q1 < delta or (q1 == delta and r1 == 0)):
+            break
+    magic = q2 + 1
+    if magic >= two31:
+        magic -= 1 << 32
+    return magic, p - 32
 
 class AssemblerConvertor:
 
-    def __init__(self, code:str,symbol_table:SymboTable, file = "output/assembler.txt") -> None:
-        self.__code = code.split('\n')
+    def __init__(self, code,symbol_table:SymboTable, file = "output/assembler.txt") -> None:
+        # code puede ser el texto del 3D o la lista de tripletas de TreeDirections
+        self.__code = parse_code(code) if isinstance(code, str) else code
         self.output = file
         self.symbol_table = symbol_table
-        self.use_temps = []
+        # Registros $t0-$t8 reservados por el convertidor
+        self.registers = TempAllocator(limit = 9)
         self.use_stemps = []
-        self.reserved = ['out_int', 'out_string', 'in_int', 'in_string', 'concat', 'substr', 'length']
+        self.reserved = list(RESERVED)
         self.param_num = 0
         self.ass_temp = []
         self.v_table = {}
+        self.class_sizes = {}
+        # clase -> {offset en bytes: Constant} de su objeto prototipo en .data
+        self.prototypes = {}
+        # Para saber que llamadas tienen un solo metodo posible (jal directo)
+        self.hierarchy = ClassHierarchy(self.__code)
+        self.direct_calls = 0
+        # Cadenas literales del programa: texto -> etiqueta en .data
+        self.strings = {}
         self.main_isCalled = False
         self.main_isStarted = False
         self.current_class = ""
         self.current_func = ""
+        # funcion -> como arma su frame (ver frame_kinds)
+        self.frames = {}
+        self.current_frame = "full"
+        self.current_frame_size = 0
         self.set_Trues = 0
 
         # self.clean()
         self.convert()
     
     def getNextTemp(self):
-        numbers_of_temps = []
-        for temp in self.use_temps:
-            numbers_of_temps.append(temp)
-        
-        conjunto = set(numbers_of_temps)
-
-        # Empezamos buscando desde el 0 en adelante
-        numero = 0
-        while True:
-            if numero not in conjunto:
-                return numero
-            numero += 1
+        # Registro $t libre mas bajo
+        return self.registers.allocate()
 
     def getLastTemp(self):
-        numbers_of_temps = []
-        for temp in self.use_temps:
-            numbers_of_temps.append(temp)
-        
-        conjunto = set(numbers_of_temps)
-
-        # Empezamos buscando desde el 0 en adelante
-        numero = 8
-        while True:
-            if numero not in conjunto:
-                return numero
-            numero -= 1
-
-    def prepare_aritmetic(self, a:str, b:str):
-        if a.startswith("t"):
-            temp1 = a
-        elif a.startswith("sp_GLOBAL"):
-            sp_index = a.split("[")[1]
-            sp_index = sp_index.split("]")[0]
-            sp_index = int(sp_index) + 8
-            temp1 = "s1"
-            assm = f"\tlw ${temp1}, {sp_index}($s7)"
-            self.write(assm)
-
-        elif a.startswith("sp"):
-            sp_index = a.split("[")[1]
-            sp_index = sp_index.split("]")[0]
-            sp_index = int(sp_index) + 4
-            temp1 = "s1"
-            assm = f"\tlw ${temp1}, {sp_index}($sp)"
-            self.write(assm)
-        else:
-            temp1 = "s1"
-
-            assmbler = f"\tli ${temp1}, {a}"
-            self.write(assmbler)
+        # Registro $t libre mas alto (desde $t8), lo deja reservado
+        return self.registers.allocate_last()
 
+    def prepare_aritmetic(self, a, b):
+        temp1 = self.prepare_operand(a, "s1")
+        temp2 = self.prepare_operand(b, "s2")
+        return temp1, temp2
 
-        if b.startswith("t"):
-            temp2 = b
-        elif b.startswith("sp_GLOBAL"):
-            sp_index = b.split("[")[1]
-            sp_index = sp_index.split("]")[0]
-            sp_index = int(sp_index) + 8
-            temp2 = "s2"
-            assm = f"\tlw ${temp2}, {sp_index}($s7)"
+    def prepare_operand(self, a, scratch):
+        # Deja el operando en un registro y regresa su nombre (sin $)
+        if isinstance(a, REGISTERS):
+            return str(a)
+        elif isinstance(a, GlobalSlot):
+            sp_index = a.index + 8
+            current = self.load_self(scratch)
+            assm = f"\tlw ${scratch}, {sp_index}(${current})"
             self.write(assm)
-            
 
-        elif b.startswith("sp"):
-            sp_index = b.split("[")[1]
-            sp_index = sp_index.split("]")[0]
-            sp_index = int(sp_index) + 4
-            temp2 = "s2"
-            assm = f"\tlw ${temp2}, {sp_index}($sp)"
+        elif isinstance(a, StackSlot):
+            sp_index = a.index + 4
+            assm = f"\tlw ${scratch}, {sp_index}($sp)"
             self.write(assm)
+        elif isinstance(a, Constant) and a.is_string():
+            self.write(f"\tla ${scratch}, {self.string_label(a.value)}")
         else:
-            temp2 = "s2"
-
-            assmbler = f"\tli ${temp2}, {b}"
+            assmbler = f"\tli ${scratch}, {a.immediate()}"
             self.write(assmbler)
-        return temp1, temp2
+        return scratch
+
+    def build_v_table(self):
+        # La tabla de la clase hija empieza con la del padre (mismo indice por metodo),
+        # las funciones que sobreescribe reemplazan la entrada y las nuevas se agregan al final
+        for instruction in self.__code:
+            if instruction.operador == Opcode.CLASS:
+                name = instruction.direccion1
+                self.v_table[name] = list(self.v_table.get(instruction.direccion2, []))
+                self.class_sizes[name] = instruction.size
+
+            elif instruction.operador == Opcode.FUNCTION:
+                name = instruction.direccion1
+                class_name, func_name = name.split(".")
+                index = self.vtable_index(class_name, func_name)
+                if index is None:
+                    self.v_table[class_name].append(name)
+                else:
+                    self.v_table[class_name][index] = name
+
+    def build_prototypes(self):
+        # Los ASSIGN sp_GLOBAL[k] constante del bloque CLASS se resuelven al
+        # compilar y van en el prototipo de la clase; NEW copia el prototipo y
+        # solo corre lo demas. Un atributo sigue como codigo si otra instruccion
+        # lo escribe, o si se lee (o hay un CALL) antes de una de sus constantes.
+        # Regresa las posiciones de las tripletas que ya no se generan
+        constructors = {}
+        current = None
+        inside = False
+        for position, instruction in enumerate(self.__code):
+            op = instruction.operador
+            if op == Opcode.CLASS:
+                current = instruction.direccion1
+                constructors[current] = []
+            elif op == Opcode.FUNCTION:
+                inside = True
+            elif op == Opcode.END_FUNCTION:
+                inside = False
+            elif op != Opcode.END_CLASS and current is not None and not inside:
+                constructors[current].append(position)
+
+        def overlaps(offset, offsets):
+            # Los sw de atributos no siempre estan alineados (Bool ocupa 1 byte)
+            return any(abs(offset - other) < 4 for other in offsets)
+
+        absorbed = set()
+        for name, positions in constructors.items():
+            excluded = set()
+            read = set()
+            read_all = False
+            written = set()
+            for position in positions:
+                instruction = self.__code[position]
+                if self.is_constant_init(instruction):
+                    offset = instruction.destino.index + 8
+                    if read_all or overlaps(offset, read) or offset % 4 != 0:
+                        excluded.add(offset)
+                    continue
+                if instruction.operador == Opcode.CALL:
+                    read_all = True
+                for operand in instruction.uses():
+                    if isinstance(operand, GlobalSlot):
+                        read.add(operand.index + 8)
+                if isinstance(instruction.defines(), GlobalSlot):
+                    written.add(instruction.defines().index + 8)
+
+            values = {}
+            for position in positions:
+                instruction = self.__code[position]
+                if not self.is_constant_init(instruction):
+                    continue
+                offset = instruction.destino.index + 8
+                if offset in excluded or overlaps(offset, written):
+                    continue
+                values[offset] = instruction.direccion1
+                absorbed.add(position)
+            self.prototypes[name] = values
+        return absorbed
+
+    def is_constant_init(self, instruction):
+        return (instruction.operador == Opcode.ASSIGN and isinstance(instruction.destino, GlobalSlot)
+                and isinstance(instruction.direccion1, Constant))
+
+    def object_size(self, name):
+        # Bytes del objeto: SIZE no siempre cubre el ultimo atributo heredado
+        size = self.class_sizes.get(name) or 8
+        for offset in self.prototypes.get(name, {}):
+            size = max(size, offset + 4)
+        return size
+
+    def prototype_word(self, value):
+        # Valor de una palabra del prototipo para .word
+        if value.is_string():
+            return self.string_label(value.value)
+        return value.immediate()
+
+    def vtable_index(self, class_name, func_name):
+        # Posicion del metodo en la tabla virtual de la clase (None si no esta)
+        for index, item in enumerate(self.v_table.get(class_name, [])):
+            if item.split(".")[1] == func_name:
+                return index
+        return None
+
+    def dispatch_offset(self, class_name, func_name):
+        # Offset en bytes dentro de la tabla virtual del tipo estatico del receptor.
+        # Los indices solo se heredan dentro de una jerarquia: sin tipo estatico
+        # solo sirve si todas las clases que tienen el metodo lo ponen en el mismo lugar
+        index = self.vtable_index(class_name, func_name)
+        if index is None and class_name not in self.v_table:
+            indexes = {self.vtable_index(other, func_name) for other in self.v_table} - {None}
+            if len(indexes) == 1:
+                index = indexes.pop()
+        if index is None:
+            raise RuntimeError(f"No se puede resolver {func_name} en la tabla virtual de {class_name}")
+        return index * 4
 
     def convert(self):
+        self.build_v_table()
+        absorbed = self.build_prototypes()
+        self.call_saves = self.live_across_calls()
+        self.frames = self.frame_kinds()
         self.write_basic()
         self.write("# ======== CODIGO ========")
-        for instruction in self.__code:
-            instruction = instruction.strip()
-            if instruction.startswith("t"):
-                op = instruction.split("=")
-                opcion = op[1].strip().split(" ")
-                if opcion[0] == "PLUS":
-                    restemp = op[0].strip()
-                    
-                    restemp = f"t{restemp[1:]}"
-                    temp1, temp2 = self.prepare_aritmetic(opcion[1], opcion[2])
-                    
-                    assmbler = f"\tadd ${restemp}, ${temp1}, ${temp2}"
-                    self.write(assmbler)
-                    # Liberar temp2
-
-                elif opcion[0] == "MINUS":
-                    restemp = op[0].strip()
-                    
-                    restemp = f"t{restemp[1:]}"
-                    temp1, temp2 = self.prepare_aritmetic(opcion[1], opcion[2])
-                    
-                    assmbler = f"\tsub ${restemp}, ${temp1}, ${temp2}"
-                    self.write(assmbler)
-                    # Liberar temp2
-
-                elif opcion[0] == "MULT":
-                    restemp = op[0].strip()
-                    
-                    restemp = f"t{restemp[1:]}"
-                    temp1, temp2 = self.prepare_aritmetic(opcion[1], opcion[2])
-                    
-                    assmbler = f"\tmult ${temp1}, ${temp2}"
+        for position, instruction in enumerate(self.__code):
+            if position in absorbed:
+                # El valor ya viene en el prototipo de la clase
+                continue
+            op = instruction.operador
+            if op in BINARY_OPS or op in UNARY_OPS:
+                restemp = str(instruction.destino)
+                self.aritmetic(instruction, restemp)
+
+            elif op == Opcode.MOVE:
+                restemp = str(instruction.destino)
+                value = instruction.direccion1
+                if isinstance(value, REGISTERS):
+                    self.write(f"# ======== temp = temp ========")
+                    assmbler = f"\tmove ${restemp}, ${value}"
                     self.write(assmbler)
 
-                    assmbler = f"\tmflo ${restemp}"
-                    self.write(assmbler)
-                    # Liberar temp2
+                elif isinstance(value, GlobalSlot):
+                    self.write(f"# ======== temp = sp_GLOBAL[index] ========")
+                    sp_index = value.index + 8
+                    current = self.load_self("s1")
+                    self.write(f"\tlw ${restemp}, {sp_index}(${current})")
 
-                elif opcion[0] == "DIV":
-                    restemp = op[0].strip()
-                    
-                    restemp = f"t{restemp[1:]}"
-                    temp1, temp2 = self.prepare_aritmetic(opcion[1], opcion[2])
+                elif isinstance(value, StackSlot):
+                    self.write(f"# ======== temp = sp[index] ========")
+                    sp_index = value.index + 4
                     
-                    assmbler = f"\tdiv ${temp1}, ${temp2}"
-                    self.write(assmbler)
+                    assm = f"\tlw ${restemp}, {sp_index}($sp)"
+                    self.write(assm)
 
-                    assmbler = f"\tmflo ${restemp}"
-                    self.write(assmbler)
-                    # Liberar temp2
+                elif isinstance(value, Constant) and value.is_string():
+                    self.write(f"# ======== temp = string ========")
+                    self.write(f"\tla ${restemp}, {self.string_label(value.value)}")
 
-                elif opcion[0] == "EQ":
-                    restemp = op[0].strip()
-                    
-                    restemp = f"t{restemp[1:]}"
-                    temp1, temp2 = self.prepare_aritmetic(opcion[1], opcion[2])
+                elif isinstance(value, Constant):
+                    self.write(f"# ======== temp = value ========")
+                    self.write(f"\tli ${restemp}, {value.immediate()}")
 
-                    label1 = f"set_true{self.set_Trues}"
-                    label2 = f"continue_labnel{self.set_Trues}"
-                    self.set_Trues += 1
+                elif isinstance(value, SelfRef):
+                    self.write(f"# ======== temp = self ========")
+                    self.move_self(restemp)
 
+                elif isinstance(value, NewObject):
+                    self.new_object(value.tipo, restemp)
 
-                    self.write(f"\tbeq ${temp1}, ${temp2}, {label1}")
-                    self.write(f"\tli ${restemp}, 0")
-                    self.write(f"\tj {label2}")
-                    self.write(f"{label1}:")
-                    self.write(f"\tli ${restemp}, 1")
-                    self.write(f"{label2}:")
-                
-                elif opcion[0].startswith("t"):
-                    restemp = op[0].strip()
-                    temp = opcion[0].strip()
-                    self.write(f"# ======== temp = temp ========")
-                    temp = f"t{temp[1:]}"
-                    assmbler = f"\tmove ${restemp}, ${temp}"
-                    self.write(assmbler)
+                else:
+                    raise RuntimeError(f"No se puede convertir {instruction}")
 
-                elif opcion[0].startswith("sp_GLOBAL"):
-                    restemp = op[0].strip()
-                    self.write(f"# ======== temp = sp_GLOBAL[index] ========")
-                    sp_index = opcion[0].split("[")[1]
-                    sp_index = sp_index.split("]")[0]
-                    sp_index = int(sp_index) + 8
-                    self.write(f"\tlw $s1, 0($sp)")
-                    self.write(f"\tlw ${restemp}, {sp_index}($s1)")
-
-                elif opcion[0].startswith("sp"):
-                    restemp = op[0].strip()
-                    self.write(f"# ======== temp = sp[index] ========")
-                    sp_index = opcion[0].split("[")[1]
-                    sp_index = sp_index.split("]")[0]
-                    sp_index = int(sp_index) + 4
+            elif op == Opcode.CALL:
+                self.call(instruction, self.call_saves.get(position))
                     
-                    assm = f"\tlw ${restemp}, {sp_index}($sp)"
-                    self.write(assm)
-
-                elif opcion[0] == "CALL":
-                    param_num = opcion[2]
-                    is_reserved = False
-                    # REVISAR SI TIENE FUNCION RESERVADA
-                    for res in self.reserved:
-                        if res in opcion[1]:
-                            restemp = op[0].strip()
-                            calling = opcion[1].split(".")
-                            clas = calling[0]
-                            if clas.startswith('sp_GLOBAL'):
-                                self.write(f"# ======== sp_GLOBAL[index] ========")
-                                sp_index = clas.split("[")[1]
-                                sp_index = sp_index.split("]")[0]
-                                sp_index = int(sp_index) + 8
-                                self.write(f"\tlw $s2, 0($sp)")
-                                self.write(f"\tlw $s1, {sp_index}($s2)")
-                            self.call_reserved(opcion,restemp)
-                                
-                            is_reserved = True
-                            break
-                    if not is_reserved:
-                        self.write(f"# ======== CALL {opcion[1]} ========")
-                        self.write(f"\tlw $s1, 0($sp)")
-                        self.write(f"\tlw $s2, 4($s1)")
-
-                        # Buscar en v_table
-                        calling = opcion[1].split(".")
-
-                            
-                        function_name = calling[1]
-                        class_name = calling[0]
-                        if class_name.startswith('sp_GLOBAL'):
-                            self.write(f"# ======== CALL sp_GLOBAL[index] ========")
-                            sp_index = class_name.split("[")[1]
-                            sp_index = sp_index.split("]")[0]
-                            sp_index = int(sp_index) + 8
-                            self.write(f"\tlw $s2, 0($sp)")
-                            self.write(f"\tlw $s1, {sp_index}($s2)")
-                            
-                            temp = self.getLastTemp()
-                            self.use_temps.append(temp)
-
-                            self.write(f"\tlw $s2, 4($s1)")
-                            self.write(f"\tlw $t{temp}, 0($s2)")
-                            self.write(f"\tmove $a0, $s1")
-                            self.write(f"\tjal save_registers")
-                            self.write(f"\tjalr $t{temp}")
-                            self.write(f"\tjal restore_registers")
-                            restemp = op[0].strip()
-                            self.write(f"\tmove ${restemp}, $v0")
-                            self.use_temps.remove(temp)
-
-                        else: 
-                        
-                            index = self.v_table[class_name].index(opcion[1]) * 4
-
-                            temp = self.getLastTemp()
-                            self.use_temps.append(temp)
-
-                            self.write(f"\tlw $t{temp}, {index}($s2)")
-                            self.write(f"\tmove $a0, $s1")
-                            
-                            self.write(f"\tjal save_registers")
-                            self.write(f"\tjalr $t{temp}")
-                            self.write(f"\tjal restore_registers")
-                            restemp = op[0].strip()
-                            self.write(f"\tmove ${restemp}, $v0")
-                            self.use_temps.remove(temp)
-
-
-                    self.param_num -= int(param_num)
-
-            elif instruction.startswith("FUNCTION"):
+            elif op == Opcode.FUNCTION:
                 
                 if self.main_isStarted and not self.main_isCalled:
                     self.write(f"\tjal Main.main")
@@ -284,181 +298,169 @@ class AssemblerConvertor:
                         self.write(f"\n\tjr $ra\n")
 
 
-                tokens = instruction.split(" ")
-                name = tokens[1]
+                name = instruction.direccion1
                 assmbler = f"\n{name}:"
 
                 self.current_func = name
-
-                class_name = name.split(".")[0]
-                self.v_table[class_name].append(name)
+                self.current_frame = self.frames.get(name, "full")
 
                 self.write(assmbler)
 
                 if name != "Main.main":
-
-                    assmbler = f"\tmove $s1, $a0"
-                    self.write(assmbler)
-                    self.reserva_memoria_func(tokens)
-                    
-                    self.write('\tsw $s1, 0($sp)')
+                    self.reserva_memoria_func(instruction)
                 else:
 
-                    self.reserva_memoria_func(tokens)
+                    self.reserva_memoria_main(instruction)
                     
                     self.write('\tsw $s7, 0($sp)')
                     self.write('\tlw $s1, 0($sp)')
                     self.write('\tmove $s1, $s2')
 
                 
-            elif instruction.startswith("sp"):
-                tokens = instruction.split(" ")
-                self.read_sp_param(tokens)
+            elif op == Opcode.LOAD_PARAM:
+                self.read_sp_param(instruction)
 
 
-            elif instruction.startswith("PARAM"):
-                tokens = instruction.split(" ")
-                name = tokens[1]
+            elif op == Opcode.PARAM:
+                value = instruction.direccion1
                 self.param_num += 1
                 # Name sp || sp_GLOBAL || string || int || float
-                if name.startswith("sp_GLOBAL") :
-                    self.assign_spGlobal_param(tokens)
-                elif name.startswith("sp"):
-                    self.assign_sp_param(tokens)
-                elif name.startswith('"'):
-
-                    value = instruction.split('PARAM ')[1]
-                    value = value[1:-1]
-                    value = value.replace("\\n", "\n")
-                    value = value.replace("\\t", "\t")
-                    temp = self.reserva_cadena_en_heap(value)
-                    self.write(f"\tmove $a{self.param_num}, $t{temp}")
-                    self.use_temps.remove(temp)
-                elif name.startswith("t"):
+                if isinstance(value, GlobalSlot):
+                    self.assign_spGlobal_param(value)
+                elif isinstance(value, StackSlot):
+                    self.assign_sp_param(value)
+                elif isinstance(value, Constant) and value.is_string():
+                    self.write(f"# ======== PARAM = string ========")
+                    self.write(f"\tla $a{self.param_num}, {self.string_label(value.value)}")
+                elif isinstance(value, REGISTERS):
                     self.write(f"# ======== PARAM = temp ========")
-                    assm = f"\tmove $a{self.param_num}, ${name}"
+                    assm = f"\tmove $a{self.param_num}, ${value}"
                     self.write(assm)
-                else:
+                elif isinstance(value, SelfRef):
+                    self.write(f"# ======== PARAM = self ========")
+                    self.move_self(f"a{self.param_num}")
+                elif isinstance(value, NewObject):
+                    # El constructor puede pisar los parametros que ya estan en $a
+                    arguments = [f"a{index}" for index in range(1, self.param_num)]
+                    self.save_live(arguments)
+                    self.new_object(value.tipo, "s2")
+                    self.restore_live(arguments)
+                    self.write(f"\tmove $a{self.param_num}, $s2")
+                elif isinstance(value, Constant):
                     self.write(f"# ======== PARAM = value ========")
-                    assm = f"\tli $a{self.param_num}, {name}"
+                    assm = f"\tli $a{self.param_num}, {value.immediate()}"
                     self.write(assm)
 
 
-            elif instruction.startswith("END FUNCTION"):
+            elif op == Opcode.END_FUNCTION:
                 self.current_func = ""
-                if name == "Main":
+                name = instruction.direccion1
+                if name == "Main.main":
                     self.main_isStarted = False
-                tokens = instruction.split(" ")
-                self.write(f"# ======== FIN FUNCION {tokens[2]} ========") # Restaurar el return address
-                self.write(f"\tmove $sp, $fp") # Restaurar el stack pointer
-                self.write(f"\tlw $ra, 4($sp)") # Restaurar el return address
-                self.write(f"\tlw $fp, 0($sp)") # Restaurar el frame pointer
-                self.write(f"\taddi $sp, $sp, 8") # Liberar el espacio del frame pointer y el return address
-
-                if tokens[2] != "Main.main":
+                self.write(f"# ======== FIN FUNCION {name} ========") # Restaurar el return address
+                if name == "Main.main":
+                    self.write(f"\tmove $sp, $fp") # Restaurar el stack pointer
+                    self.write(f"\tlw $ra, 4($sp)") # Restaurar el return address
+                    self.write(f"\tlw $fp, 0($sp)") # Restaurar el frame pointer
+                    self.write(f"\taddi $sp, $sp, 8") # Liberar el espacio del frame pointer y el return address
+                else:
+                    self.libera_memoria_func()
                     self.write(f"\tjr $ra\n")
+                self.current_frame = "full"
 
 
-            elif instruction.startswith("CLASS"):
-                tokens = instruction.split(" ")
-                name = tokens[1]
+            elif op == Opcode.CLASS:
+                name = instruction.direccion1
                 assmbler = f"CLASS_{name}:\n"
                 self.write(assmbler)
 
                 if name == "Main":
                     self.main_isStarted = True
 
-                self.v_table[name] = []
-
-                self.reserva_memoria_class(tokens)
+                self.reserva_memoria_class(instruction)
                 self.current_class = name
 
-            elif instruction.startswith("ASSIGN"):
-                tokens = instruction.split(" ")
-                name = tokens[1]
-                value = tokens[2]
-
-                if name.startswith("sp_GLOBAL"):
-                    self.assign_sp_global(tokens)
-                elif name.startswith("sp"):
-                    self.assing_sp(tokens)
-                elif name.startswith('"'):
-                    temp = self.reserva_cadena_en_heap(value[1:-1])
+            elif op == Opcode.END_CLASS:
+                # Una clase que solo hereda metodos no tiene FUNCTION que cierre el constructor
+                own = [item for item in self.v_table[self.current_class] if item.startswith(f"{self.current_class}.")]
+                if len(own) == 0 and self.current_class != "Main":
+                    self.write(f"\tjr $ra\n")
 
-                    self.write(f"")
+            elif op == Opcode.ASSIGN:
+                if isinstance(instruction.destino, GlobalSlot):
+                    self.assign_sp_global(instruction)
+                elif isinstance(instruction.destino, StackSlot):
+                    self.assing_sp(instruction)
 
-            elif instruction.startswith("RETURN"):
-                tokens = instruction.split(" ")
-                name = tokens[1]
+            elif op == Opcode.RETURN:
+                value = instruction.direccion1
 
-                if name.startswith("sp_GLOBAL"):
+                if isinstance(value, GlobalSlot):
                     self.write(f"# ======== RETURN sp_GLOBAL[index] ========")
-                    sp_index = name.split("[")[1]
-                    sp_index = sp_index.split("]")[0]
-                    sp_index = int(sp_index) + 8
-                    self.write(f"\tlw $s1, 0($sp)")
-                    self.write(f"\tlw $v0, {sp_index}($s1)")
+                    sp_index = value.index + 8
+                    current = self.load_self("s1")
+                    self.write(f"\tlw $v0, {sp_index}(${current})")
 
-                elif name.startswith("sp"):
+                elif isinstance(value, StackSlot):
                     self.write(f"# ======== RETURN sp[index] ========")
-                    sp_index = name.split("[")[1]
-                    sp_index = sp_index.split("]")[0]
-                    sp_index = int(sp_index) + 4
+                    sp_index = value.index + 4
                     
                     assm = f"\tlw $v0, {sp_index}($sp)"
                     self.write(assm)
-                elif name.startswith("t"):
+                elif isinstance(value, REGISTERS):
                     self.write(f"# ======== RETURN t ========")
                     
-                    self.write(f"\tmove $v0, ${name}")
-
-
-
-                # assmbler = f"\tli ${name}, {value}"
-                # self.write(assmbler)
-
-            elif instruction.startswith("IF"):
-                tokens = instruction.split(" ")
-                name = tokens[1]
-                label = tokens[3].lower()
-                if name.startswith("t"):
+                    self.write(f"\tmove $v0, ${value}")
+                elif isinstance(value, Constant) and value.is_string():
+                    self.write(f"# ======== RETURN string ========")
+                    self.write(f"\tla $v0, {self.string_label(value.value)}")
+                elif isinstance(value, Constant):
+                    self.write(f"# ======== RETURN value ========")
+                    self.write(f"\tli $v0, {value.immediate()}")
+                elif isinstance(value, SelfRef):
+                    self.write(f"# ======== RETURN self ========")
+                    self.move_self("v0")
+                elif isinstance(value, NewObject):
+                    self.new_object(value.tipo, "v0")
+                else:
+                    raise RuntimeError(f"No se puede convertir {instruction}")
+
+            elif op in BRANCHES:
+                value = instruction.direccion1
+                label = instruction.direccion2.name.lower()
+                # IF salta si es distinto de cero, IFNOT si es cero
+                branch = "bne" if op == Opcode.IF else "beq"
+                if isinstance(value, REGISTERS):
                     
-                    self.write(f"# ======== IF temp ========")
+                    self.write(f"# ======== {op.value} temp ========")
                     
-                    self.write(f"\tbne ${name}, $zero, {label}\n")
-                elif name.startswith("sp_GLOBAL"):
-                    self.write(f"# ======== IF sp_GLOBAL[index] ========")
-                    sp_index = name.split("[")[1]
-                    sp_index = sp_index.split("]")[0]
-                    sp_index = int(sp_index) + 8
-                    self.write(f"\tlw $s1, 0($sp)")
-                    self.write(f"\tlw $s2, {sp_index}($s1)")
-                    self.write(f"\tlw $t0, 0($s2)")
-                    self.write(f"\tbne $t0, $zero, {label}\n")
-                elif name.startswith("sp"):
-                    self.write(f"# ======== IF sp[index] ========")
-                    sp_index = name.split("[")[1]
-                    sp_index = sp_index.split("]")[0]
-                    sp_index = int(sp_index) + 4
+                    self.write(f"\t{branch} ${value}, $zero, {label}\n")
+                elif isinstance(value, GlobalSlot):
+                    self.write(f"# ======== {op.value} sp_GLOBAL[index] ========")
+                    sp_index = value.index + 8
+                    current = self.load_self("s1")
+                    self.write(f"\tlw $s2, {sp_index}(${current})")
+                    self.write(f"\t{branch} $s2, $zero, {label}\n")
+                elif isinstance(value, StackSlot):
+                    self.write(f"# ======== {op.value} sp[index] ========")
+                    sp_index = value.index + 4
                     
-                    assm = f"\tlw $t0, {sp_index}($sp)"
+                    assm = f"\tlw $s2, {sp_index}($sp)"
                     self.write(assm)
-                    self.write(f"\tbne $t0, $zero, {label}\n")
+                    self.write(f"\t{branch} $s2, $zero, {label}\n")
                 else:
-                    self.write(f"# ======== IF value ========")
-                    assm = f"\tli s3, {name}"
+                    self.write(f"# ======== {op.value} value ========")
+                    assm = f"\tli $s3, {value.immediate()}"
                     self.write(assm)
-                    self.write(f"\tbne $s3, $zero, {label}\n")
+                    self.write(f"\t{branch} $s3, $zero, {label}\n")
 
-            elif instruction.startswith("GOTO"):
-                tokens = instruction.split(" ")
-                label = tokens[1].lower()
+            elif op == Opcode.GOTO:
+                label = instruction.direccion1.name.lower()
                 self.write(f"# ======== GOTO ========")
                 self.write(f"\tj {label}\n")
 
-            elif instruction.startswith("LABEL"):
-                tokens = instruction.split(":")
-                label = tokens[0].lower()
+            elif op == Opcode.LABEL:
+                label = instruction.direccion1.name.lower()
                 self.write(f"# ======== LABEL ========")
                 self.write(f"{label}:\n")
 
@@ -475,9 +477,301 @@ class AssemblerConvertor:
 
         self.end()
 
-    def call_reserved(self, tokens, restemp):
-        tipe = tokens[1]
-        func_name = tipe.split(".")[1]
+    def aritmetic(self, instruction, restemp):
+        op = instruction.operador
+        if op in UNARY_OPS:
+            temp1 = self.prepare_operand(instruction.direccion1, "s1")
+            if op == Opcode.NOT:
+                self.write(f"\txori ${restemp}, ${temp1}, 1")
+            elif op == Opcode.NEG:
+                self.write(f"\tsub ${restemp}, $zero, ${temp1}")
+            else:
+                self.write(f"\tseq ${restemp}, ${temp1}, $zero")
+            return
+
+        if op == Opcode.MULT and self.multiply_constant(instruction, restemp):
+            return
+        if op == Opcode.DIV and self.divide_constant(instruction, restemp):
+            return
+
+        temp1, temp2 = self.prepare_aritmetic(instruction.direccion1, instruction.direccion2)
+        if op == Opcode.PLUS:
+            assmbler = f"\tadd ${restemp}, ${temp1}, ${temp2}"
+            self.write(assmbler)
+            # Liberar temp2
+
+        elif op == Opcode.MINUS:
+            assmbler = f"\tsub ${restemp}, ${temp1}, ${temp2}"
+            self.write(assmbler)
+            # Liberar temp2
+
+        elif op == Opcode.MULT:
+            assmbler = f"\tmult ${temp1}, ${temp2}"
+            self.write(assmbler)
+
+            assmbler = f"\tmflo ${restemp}"
+            self.write(assmbler)
+            # Liberar temp2
+
+        elif op == Opcode.DIV:
+            assmbler = f"\tdiv ${temp1}, ${temp2}"
+            self.write(assmbler)
+
+            assmbler = f"\tmflo ${restemp}"
+            self.write(assmbler)
+            # Liberar temp2
+
+        elif op == Opcode.LT:
+            self.write(f"\tslt ${restemp}, ${temp1}, ${temp2}")
+
+        elif op == Opcode.LE:
+            self.write(f"\tsle ${restemp}, ${temp1}, ${temp2}")
+
+        elif op == Opcode.EQ:
+            label1 = f"set_true{self.set_Trues}"
+            label2 = f"continue_labnel{self.set_Trues}"
+            self.set_Trues += 1
+
+
+            self.write(f"\tbeq ${temp1}, ${temp2}, {label1}")
+            self.write(f"\tli ${restemp}, 0")
+            self.write(f"\tj {label2}")
+            self.write(f"{label1}:")
+            self.write(f"\tli ${restemp}, 1")
+            self.write(f"{label2}:")
+
+    def multiply_constant(self, instruction, restemp):
+        # x * 2^k -> sll (y sub si la constante es negativa)
+        operands = ((instruction.direccion2, instruction.direccion1), (instruction.direccion1, instruction.direccion2))
+        for constant, other in operands:
+            value = int_constant(constant)
+            if value is not None and power_of_two(abs(value)) is not None:
+                temp = self.prepare_operand(other, "s1")
+                self.write(f"\tsll ${restemp}, ${temp}, {power_of_two(abs(value))}")
+                if value < 0:
+                    self.write(f"\tsub ${restemp}, $zero, ${restemp}")
+                return True
+        return False
+
+    def divide_constant(self, instruction, restemp):
+        # x / d con d constante: corrimientos para 2^k y mult/mfhi con numero
+        # magico para lo demas; div tarda mucho mas. Trunca hacia cero como div
+        divisor = int_constant(instruction.direccion2)
+        if divisor is None or divisor == 0 or divisor == -(1 << 31):
+            return False
+        temp = self.prepare_operand(instruction.direccion1, "s1")
+        shift = power_of_two(abs(divisor))
+        if shift == 0:
+            self.write(f"\tmove ${restemp}, ${temp}")
+        elif shift is not None:
+            # Se suma 2^k - 1 a los negativos para truncar hacia cero
+            self.write(f"\tsra $s3, ${temp}, 31")
+            self.write(f"\tsrl $s3, $s3, {32 - shift}")
+            self.write(f"\taddu $s3, ${temp}, $s3")
+            self.write(f"\tsra ${restemp}, $s3, {shift}")
+        else:
+            magic, shift = division_magic(abs(divisor))
+            self.write(f"\tli $s2, {magic}")
+            self.write(f"\tmult ${temp}, $s2")
+            self.write(f"\tmfhi $s3")
+            if magic < 0:
+                self.write(f"\taddu $s3, $s3, ${temp}")
+            if shift > 0:
+                self.write(f"\tsra $s3, $s3, {shift}")
+            # +1 si x es negativo
+            self.write(f"\tsrl $s2, ${temp}, 31")
+            self.write(f"\taddu ${restemp}, $s3, $s2")
+        if divisor < 0:
+            self.write(f"\tsub ${restemp}, $zero, ${restemp}")
+        return True
+
+    def load_receiver(self, receiver):
+        # Deja en $s1 el objeto sobre el que se llama el metodo
+        if isinstance(receiver, GlobalSlot):
+            sp_index = receiver.index + 8
+            current = self.load_self("s2")
+            self.write(f"\tlw $s1, {sp_index}(${current})")
+        elif isinstance(receiver, StackSlot):
+            self.write(f"\tlw $s1, {receiver.index + 4}($sp)")
+        elif isinstance(receiver, REGISTERS):
+            self.write(f"\tmove $s1, ${receiver}")
+        elif isinstance(receiver, (str, SelfRef)):
+            self.move_self("s1")
+        elif isinstance(receiver, Constant) and receiver.is_string():
+            self.write(f"\tla $s1, {self.string_label(receiver.value)}")
+        elif isinstance(receiver, Constant):
+            self.write(f"\tli $s1, {receiver.immediate()}")
+
+    def live_across_calls(self):
+        # Posicion de cada CALL dentro de una funcion -> registros $t que siguen
+        # vivos despues (los unicos que hay que guardar; los $s los guarda la
+        # funcion que los usa)
+        saves = {}
+        for start, end in split_functions(self.__code):
+            body = self.__code[start + 1:end]
+            live_after = Liveness(body, tracked = REGISTERS).live_after()
+            for position, instruction in enumerate(body):
+                if instruction.operador != Opcode.CALL or instruction.direccion1.method in self.reserved:
+                    continue
+                live = live_after[position] - {instruction.destino}
+                names = {self.caller_saved(operand) for operand in live} - {None}
+                saves[start + 1 + position] = sorted(names)
+        return saves
+
+    def caller_saved(self, operand):
+        # Registro que tiene que guardar el que llama (None si lo guarda la funcion)
+        if isinstance(operand, Register) and operand.name in RegisterAllocator.CALLER_SAVED:
+            return operand.name
+        if isinstance(operand, Temporal):
+            # Codigo sin asignar registros: el temporal tN se emite como $tN
+            return f"t{operand.number}"
+        return None
+
+    def save_live(self, saved):
+        # saved None: llamada fuera de una funcion, se guardan todos
+        if saved is None:
+            self.write(f"\tjal save_registers")
+        elif len(saved) > 0:
+            self.write(f"\taddi $sp, $sp, -{4 * len(saved)}")
+            for index, name in enumerate(saved):
+                self.write(f"\tsw ${name}, {4 * index}($sp)")
+
+    def restore_live(self, saved):
+        if saved is None:
+            self.write(f"\tjal restore_registers")
+        elif len(saved) > 0:
+            for index, name in enumerate(saved):
+                self.write(f"\tlw ${name}, {4 * index}($sp)")
+            self.write(f"\taddi $sp, $sp, {4 * len(saved)}")
+
+    def call(self, instruction, saved = None):
+        method = instruction.direccion1
+        restemp = str(instruction.destino)
+        param_num = instruction.direccion2
+        # REVISAR SI TIENE FUNCION RESERVADA
+        if method.method in self.reserved:
+            if isinstance(method.receiver, GlobalSlot):
+                self.write(f"# ======== sp_GLOBAL[index] ========")
+                self.load_receiver(method.receiver)
+            self.call_reserved(method.method, restemp)
+
+        elif self.object_method(method):
+            self.call_object_method(method, restemp)
+
+        elif isinstance(method.receiver, NewObject):
+            # (new X).metodo(): el objeto se crea aqui y el metodo es el de X
+            target = self.hierarchy.call_target(method)
+            if target is None:
+                raise RuntimeError(f"La clase {method.receiver.tipo} no tiene el metodo {method.method}")
+            self.write(f"# ======== CALL {method} ========")
+            # El constructor pisa los $t y puede usar los $a que traen los parametros
+            self.save_live(saved)
+            arguments = [f"a{index}" for index in range(1, param_num + 1)]
+            self.save_live(arguments)
+            self.new_object(method.receiver.tipo, "s1")
+            self.restore_live(arguments)
+            self.write(f"\tmove $a0, $s1")
+            self.write(f"\tjal {target}")
+            self.restore_live(saved)
+            self.write(f"\tmove ${restemp}, $v0")
+            self.direct_calls += 1
+
+        else:
+            self.write(f"# ======== CALL {method} ========")
+            self.write(f"\tlw $s1, 0($sp)")
+            target = self.hierarchy.call_target(method)
+
+            if target is not None:
+                # Nadie redefine el metodo: se salta directo, sin leer la tabla virtual
+                if not method.is_self_call():
+                    self.load_receiver(method.receiver)
+                self.write(f"\tmove $a0, $s1")
+                self.save_live(saved)
+                self.write(f"\tjal {target}")
+                self.restore_live(saved)
+                self.write(f"\tmove ${restemp}, $v0")
+                self.direct_calls += 1
+
+            # Buscar en v_table
+            elif not method.is_self_call():
+                self.write(f"# ======== CALL sp_GLOBAL[index] ========")
+                self.load_receiver(method.receiver)
+                
+                temp = self.getLastTemp()
+
+                index = self.dispatch_offset(method.receiver_type(), method.method)
+
+                self.write(f"\tlw $s2, 4($s1)")
+                self.write(f"\tlw $t{temp}, {index}($s2)")
+                self.write(f"\tmove $a0, $s1")
+                self.save_live(saved)
+                self.write(f"\tjalr $t{temp}")
+                self.restore_live(saved)
+                self.write(f"\tmove ${restemp}, $v0")
+                self.registers.release(temp)
+
+            else: 
+            
+                self.write(f"\tlw $s2, 4($s1)")
+                index = self.dispatch_offset(method.receiver, method.method)
+
+                temp = self.getLastTemp()
+
+                self.write(f"\tlw $t{temp}, {index}($s2)")
+                self.write(f"\tmove $a0, $s1")
+                
+                self.save_live(saved)
+                self.write(f"\tjalr $t{temp}")
+                self.restore_live(saved)
+                self.write(f"\tmove ${restemp}, $v0")
+                self.registers.release(temp)
+
+
+        self.param_num -= int(param_num)
+
+    def object_method(self, method):
+        # type_name/abort/copy de Object: se resuelven sin la tabla virtual si el
+        # tipo del receptor no los redefine (sin tipo, si ninguna clase lo hace)
+        if method.method not in OBJECT_METHODS:
+            return False
+        class_name = method.at_type or method.receiver_type()
+        if class_name in self.v_table:
+            return self.vtable_index(class_name, method.method) is None
+        if class_name in ("Int", "Bool", "String"):
+            return True
+        return all(self.vtable_index(other, method.method) is None for other in self.v_table)
+
+    def call_object_method(self, method, restemp):
+        self.write(f"# ======== CALL Object.{method.method} ========")
+        class_name = method.receiver_type()
+        basic = class_name in ("Int", "Bool", "String")
+        if method.method == "abort":
+            self.write(f"\tli $v0, 10")
+            self.write(f"\tsyscall")
+        elif method.method == "type_name" and (basic or isinstance(method.receiver, NewObject)):
+            # El tipo del objeto ya se sabe: su nombre es una constante
+            self.write(f"\tla ${restemp}, {self.string_label(class_name)}")
+        elif method.method == "type_name":
+            # desc_X empieza con la etiqueta del nombre de la clase
+            self.load_receiver(method.receiver)
+            self.write(f"\tlw $s2, 0($s1)")
+            self.write(f"\tlw ${restemp}, 0($s2)")
+        elif isinstance(method.receiver, NewObject):
+            # La copia de un objeto nuevo es otro objeto nuevo
+            self.new_object(method.receiver.tipo, restemp)
+        elif basic:
+            # Int y Bool son valores y los String no cambian: la copia es el mismo
+            self.load_receiver(method.receiver)
+            self.write(f"\tmove ${restemp}, $s1")
+        else:
+            self.load_receiver(method.receiver)
+            saved = ["ra"] if self.current_func == "" and self.current_class != "Main" else []
+            self.save_live(saved)
+            self.write(f"\tjal object_copy")
+            self.restore_live(saved)
+            self.write(f"\tmove ${restemp}, $v0")
+
+    def call_reserved(self, func_name, restemp):
         if func_name == "out_string":
             self.write(f"# ======== CALL out_string ========")
             self.write(f"\tmove $a0, $a1")
@@ -519,267 +813,261 @@ class AssemblerConvertor:
 
 
 
-    def assign_sp_param(self, tokens):
+    def assign_sp_param(self, value):
         self.write(f"# ======== PARAM = sp[index] ========")
-        sp_index = tokens[1].split("sp[")[1]
-        sp_index = int(sp_index[:-1]) + 4
+        sp_index = value.index + 4
 
         sp_param = self.param_num
         
         self.write(f"\tlw $a{sp_param}, {sp_index}($sp)\n")
 
-    def assign_spGlobal_param(self, tokens):
+    def assign_spGlobal_param(self, value):
         self.write(f"# ======== PARAM = sp_GLOBAL[index] ========")
-        sp_index = tokens[1].split("sp_GLOBAL[")[1]
-        sp_index = int(sp_index[:-1]) + 8
+        sp_index = value.index + 8
         
        
         self.write(f"\tlw $s1, 0($sp)")
-        self.write(f"\tlw $a1, {sp_index}($s1)\n")
+        self.write(f"\tlw $a{self.param_num}, {sp_index}($s1)\n")
 
-    def read_sp_param(self, tokens):
+    def read_sp_param(self, instruction):
         self.write(f"# ======== sp[index] = PARAM_X ========")
-        sp_index = tokens[0].split("sp[")[1]
-        sp_index = int(sp_index[:-1]) + 4
+        sp_index = instruction.destino.index + 4
 
-        sp_param = tokens[2].split("PARAM_")[1]
-        sp_param = int(sp_param) + 1
+        sp_param = instruction.direccion1.index + 1
 
         
         self.write(f"\tsw $a{sp_param}, {sp_index}($sp)\n")
 
-    def assign_sp_global(self, tokens):
+    def assign_sp_global(self, instruction):
         
-        sp_index = tokens[1].split("sp_GLOBAL[")[1]
-        sp_index = sp_index[:-1]
-        sp_index = int(sp_index) + 8
+        sp_index = instruction.destino.index + 8
+        value = instruction.direccion1
 
-        if tokens[2].startswith('"'):
-            self.write(f"# ======== sp_GLOBAL[index] = value ========")
-            value = tokens[2][1:-1]
-            value = value.replace("\\n", "\n")
-            value = value.replace("\\t", "\t")
-            tvalue = len(value) +1 
-            temp = self.reserva_bytes_en_heap(tvalue)
-        
-            self.alamcenar_cadena_en_heap(value, temp)
-            
+        if isinstance(value, Constant) and value.is_string():
+            self.write(f"# ======== sp_GLOBAL[index] = string ========")
+            temp = self.getLastTemp()
 
-            self.write(f"\tsw $t{temp}, {sp_index}($s7)")
-            self.use_temps.remove(temp)
+            self.write(f"\tla $t{temp}, {self.string_label(value.value)}")
+            current = self.load_self("s2")
+            self.write(f"\tsw $t{temp}, {sp_index}(${current})")
+            self.registers.release(temp)
 
-        elif tokens[2].startswith("sp"):
+        elif isinstance(value, StackSlot):
             self.write(f"# ======== sp_GLOBAL[index] = sp[index] ========")
-            sp_index = tokens[1].split("sp_GLOBAL[")[1]
-            sp_index = sp_index[:-1]
-            sp_index = int(sp_index) + 8
-
-            sp_index2 = tokens[2].split("sp[")[1]
-            sp_index2 = sp_index2[:-1]
-            sp_index2 = int(sp_index2) + 4
+            sp_index2 = value.index + 4
             
             #TODO: REVISAR CON STEFANO
-            self.write(f"\tlw $t0, {sp_index2}($sp)")
-            self.write(f"\tsw $t0, {sp_index}($s7)")
-
+            self.write(f"\tlw $s1, {sp_index2}($sp)")
+            current = self.load_self("s2")
+            self.write(f"\tsw $s1, {sp_index}(${current})")
 
+        elif isinstance(value, GlobalSlot):
+            self.write(f"# ======== sp_GLOBAL[index] = sp_GLOBAL[index] ========")
+            current = self.load_self("s2")
+            self.write(f"\tlw $s1, {value.index + 8}(${current})")
+            self.write(f"\tsw $s1, {sp_index}(${current})")
 
-        elif tokens[2].startswith("t"):
+        elif isinstance(value, REGISTERS):
             self.write(f"# ======== sp_GLOBAL[index] = temp# ========")
-            sp_index = tokens[1].split("sp_GLOBAL[")[1]
-            sp_index = sp_index[:-1]
-            sp_index = int(sp_index) + 8
-
-            assm = f"\tsw ${tokens[2]}, {sp_index}($s7)"
+            current = self.load_self("s2")
+            assm = f"\tsw ${value}, {sp_index}(${current})"
             self.write(assm)
 
-        elif tokens[2].startswith("NEW"):
-            
-            self.write(f"# ======== CREAR NUEVO OBJETO {tokens[3]}========")
-            if self.current_func == "":
-        
-                self.write(f"\tjal CLASS_{tokens[3]}")
-                sp_index = tokens[1].split("sp_GLOBAL[")[1]
-                sp_index = sp_index[:-1]
-                sp_index = int(sp_index) + 8
-                
-                self.write(f"\tsw $s7, {sp_index}($s6)")
-                self.write(f"\tmove $s7, $s6")
-            else:
-                self.write(f"\tjal CLASS_{tokens[3]}")
-                sp_index = tokens[1].split("sp_GLOBAL[")[1]
-                sp_index = sp_index[:-1]
-                sp_index = int(sp_index) + 8
-                self.write(f"\tlw $s2, 0($sp)")
-                self.write(f"\tsw $s7, {sp_index}($s2)")
-                self.write(f"\tmove $s7, $s6")
-        else:
+        elif isinstance(value, NewObject):
+            self.new_object(value.tipo, "s2")
+            current = self.load_self("s1")
+            self.write(f"\tsw $s2, {sp_index}(${current})")
+        elif isinstance(value, Constant):
             self.write(f"# ======== sp_GLOBAL[index] = value ========")
             temp = self.getLastTemp()
-            self.use_temps.append(temp)
 
-            self.write(f"\tli $t{temp}, {tokens[2]}")
-            self.write(f"\tsw $t{temp}, {sp_index}($s7)")
-            self.use_temps.remove(temp)
+            self.write(f"\tli $t{temp}, {value.immediate()}")
+            current = self.load_self("s2")
+            self.write(f"\tsw $t{temp}, {sp_index}(${current})")
+            self.registers.release(temp)
 
             #
 
 
         
-    def assing_sp(self, tokens):
+    def assing_sp(self, instruction):
         
-        sp_index = tokens[1].split("sp[")[1]
-        sp_index = sp_index[:-1]
-        sp_index = int(sp_index) + 4
+        sp_index = instruction.destino.index + 4
+        value = instruction.direccion1
 
-        if tokens[2].startswith('"'):
-            self.write(f"# ======== sp[index] = value ========")
-            value = tokens[2][1:-1]
-            value = value.replace("\\n", "\n")
-            value = value.replace("\\t", "\t")
-            tvalue = len(value) +1 
-            temp = self.reserva_bytes_en_heap(tvalue)
-        
-            self.alamcenar_cadena_en_heap(value, temp)
-            
+        if isinstance(value, Constant) and value.is_string():
+            self.write(f"# ======== sp[index] = string ========")
+            temp = self.getLastTemp()
 
+            self.write(f"\tla $t{temp}, {self.string_label(value.value)}")
             self.write(f"\tsw $t{temp}, {sp_index}($sp)")
-            self.use_temps.remove(temp)
-
-        elif tokens[2].startswith("sp"):
-            sp_index = tokens[1].split("sp[")[1]
-            sp_index = sp_index[:-1]
-            sp_index = int(sp_index) + 4
+            self.registers.release(temp)
 
-            sp_index2 = tokens[2].split("sp[")[1]
-            sp_index2 = sp_index2[:-1]
-            sp_index2 = int(sp_index2) + 4
+        elif isinstance(value, StackSlot):
+            sp_index2 = value.index + 4
 
             #TODO: REVISAR CON STEFANO
             self.write(f"# ======== sp[index] = sp[index] ========")
-            self.write(f"\tlw $t0, {sp_index2}($sp)")
-            self.write(f"\tsw $t0, {sp_index}($sp)")
+            self.write(f"\tlw $s1, {sp_index2}($sp)")
+            self.write(f"\tsw $s1, {sp_index}($sp)")
 
-        elif tokens[2].startswith("t"):
-            self.write(f"# ======== sp[index] = temp# ========")
-            sp_index = tokens[1].split("sp[")[1]
-            sp_index = sp_index[:-1]
-            sp_index = int(sp_index) + 4
+        elif isinstance(value, GlobalSlot):
+            self.write(f"# ======== sp[index] = sp_GLOBAL[index] ========")
+            current = self.load_self("s1")
+            self.write(f"\tlw $s2, {value.index + 8}(${current})")
+            self.write(f"\tsw $s2, {sp_index}($sp)")
 
-            assm = f"\tsw ${tokens[2]}, {sp_index}($sp)"
+        elif isinstance(value, REGISTERS):
+            self.write(f"# ======== sp[index] = temp# ========")
+            assm = f"\tsw ${value}, {sp_index}($sp)"
             self.write(assm)
             
-        elif tokens[2].startswith("NEW"):
-            self.write(f"# ======== CREAR NUEVO OBJETO {tokens[3]}========")
-
-            if self.current_func == "":
-        
-                self.write(f"\tjal CLASS_{tokens[3]}")
-                self.write(f"\tlw $s2, {0}($sp)")
-                sp_index = tokens[1].split("sp_GLOBAL[")[1]
-                sp_index = sp_index[:-1]
-                sp_index = int(sp_index) + 8
-                self.write(f"\tsw $s7, {sp_index}($s6)")
-                self.write(f"\tmove $s7, $s6")
-            else:
-                self.write(f"\tjal CLASS_{tokens[3]}")
-                self.write(f"\tlw $s2, {0}($sp)")
-                sp_index = tokens[1].split("sp_GLOBAL[")[1]
-                sp_index = sp_index[:-1]
-                sp_index = int(sp_index) + 8
-                self.write(f"\tsw $s7, {sp_index}($s2)")
-                self.write(f"\tmove $s7, $s6")
-        else:
+        elif isinstance(value, NewObject):
+            self.new_object(value.tipo, "s2")
+            self.write(f"\tsw $s2, {sp_index}($sp)")
+        elif isinstance(value, Constant):
             self.write(f"# ======== sp[index] = value ========")
             temp = self.getLastTemp()
-            self.use_temps.append(temp)
 
-            self.write(f"\tli $t{temp}, {tokens[2]}")
+            self.write(f"\tli $t{temp}, {value.immediate()}")
             self.write(f"\tsw $t{temp}, {sp_index}($sp)")
-            self.use_temps.remove(temp)
+            self.registers.release(temp)
             
 
 
         
 
-    def reserva_cadena_en_heap(self, cadena):
-
-        name_len = len(cadena) + 1
-        name_mem = self.reserva_bytes_en_heap(name_len)
-        self.alamcenar_cadena_en_heap(cadena, name_mem)
-
-        return name_mem
-
-    def reserva_memoria_class(self, tokens):
-        self.write(f"# ======== RESERVA DE MEMORIA para CLASS_{tokens[1]} ========")
-        size = 0
-
-        for index, token in enumerate(tokens):
-            if token == 'SIZE':
-                size = tokens[index + 1]
-                break
+    def new_object(self, tipo, dest):
+        # Todo NEW pasa por aqui: CLASS_X copia el prototipo, corre los
+        # inicializadores y deja el objeto en $s7. $s7 es el self del constructor,
+        # asi que se guarda el de quien crea el objeto; dentro de otro constructor
+        # tambien su $ra (las funciones ya lo tienen en su frame y el de Main no
+        # regresa, sigue con Main.main)
+        self.write(f"# ======== CREAR NUEVO OBJETO {tipo} ========")
+        saved = ["s7"]
+        if self.current_func == "" and self.current_class != "Main":
+            saved.append("ra")
+        self.save_live(saved)
+        self.write(f"\tjal CLASS_{tipo}")
+        self.write(f"\tmove ${dest}, $s7")
+        self.restore_live(saved)
+
+    def string_label(self, cadena):
+        # Etiqueta del .asciiz de la cadena; las cadenas iguales comparten etiqueta
+        if cadena not in self.strings:
+            self.strings[cadena] = f"str_{len(self.strings)}"
+        return self.strings[cadena]
+
+    def reserva_memoria_class(self, instruction):
+        name = instruction.direccion1
+        self.write(f"# ======== RESERVA DE MEMORIA para CLASS_{name} ========")
+        size = self.object_size(name)
 
         temp = self.getLastTemp()
-        self.use_temps.append(temp)
 
         self.write(f"\tli $a0, {size}")
         self.write(f"\tli $v0, 9")
         self.write(f"\tsyscall")
         self.write(f"\tmove $t{temp}, $v0")
 
-        name_len = len(tokens[1]) + 1
-        name_mem = self.reserva_bytes_en_heap(name_len)
-        self.alamcenar_cadena_en_heap(tokens[1], name_mem)
-
-        self.write(f"\tsw $t{name_mem}, 0($t{temp})")
-        self.write(f"\tla $t0 vt_{tokens[1]}")
-        self.write(f"\tsw $t0, 4($t{temp})")
+        # Copia del prototipo (descriptor, tabla virtual y atributos constantes).
+        # La memoria del syscall 9 viene en cero: las palabras en cero no se copian
+        self.write(f"# ======== COPIAR PROTOTIPO proto_{name} ========")
+        prototype = self.getLastTemp()
+        word = self.getLastTemp()
+        self.write(f"\tla $t{prototype}, proto_{name}")
+        for offset in [0, 4] + sorted(self.prototypes.get(name, {})):
+            if offset >= 8 and self.prototypes[name][offset].value in (0, False):
+                continue
+            self.write(f"\tlw $t{word}, {offset}($t{prototype})")
+            self.write(f"\tsw $t{word}, {offset}($t{temp})")
         self.write(f"\tmove $s7, $t{temp}")
 
-        self.use_temps.remove(temp)
-        self.use_temps.remove(name_mem)
-
-
-    def reserva_bytes_en_heap(self, num_bytes):
-        self.write(f"# ======== RESERVA DE {num_bytes} BYTES EN HEAP ========")
-
-        temp = self.getLastTemp()
-        self.use_temps.append(temp)
-
-        self.write(f"\tli $t{temp}, {num_bytes}")
-        self.write(f"\tmove $a0, $t{temp}")
-        self.write(f"\tli $v0, 9")
-        self.write(f"\tsyscall")
-        self.write(f"\tmove $t{temp}, $v0")
-
-        return temp
-
-    def alamcenar_cadena_en_heap(self, cadena,mem_pos):
-        self.write(f"# ======== ALMACENAR CADENA EN HEAP ========")
-
-        temp = self.getLastTemp()
-        self.use_temps.append(temp)
-
-        for index, charac in enumerate(cadena):
-            self.write(f"\tli $t{temp}, {self.string_to_ASCII(charac)}")
-            self.write(f"\tsb $t{temp}, {index}($t{mem_pos})")
-        
-        self.write(f"\tsb $zero, {len(cadena)}($t{mem_pos})\n")
-
-        self.use_temps.remove(temp)
-    
-    def string_to_ASCII(self, charac):
-        return ord(charac)
-
-
-    def reserva_memoria_func(self, tokens):
-        self.write(f"# ======== INICIALIZAR DE MEMORIA FUNCION {tokens[1]} ========")
+        self.registers.release(temp)
+        self.registers.release(prototype)
+        self.registers.release(word)
+
+
+    def frame_kinds(self):
+        # Como arma su frame cada funcion:
+        #   frameless: no llama a nada ni usa sp[k]; no mueve $sp y self se queda en $a0
+        #   leaf: no llama a nada; reserva sus sp[k] pero no guarda $ra ni self
+        #   full: guarda self en 0($sp) y $ra arriba de las variables locales
+        # Todo se direcciona con $sp; solo Main.main usa $fp (su self viene en
+        # $s7 y no en $a0, siempre es full)
+        frames = {}
+        for start, end in split_functions(self.__code):
+            if self.__code[start].direccion1 == "Main.main":
+                frames["Main.main"] = "full"
+                continue
+            leaf = True
+            slots = False
+            for instruction in self.__code[start + 1:end]:
+                operands = instruction.uses() + [instruction.defines()]
+                # NEW salta a CLASS_X y los metodos reservados a su rutina: pisan $ra
+                if instruction.operador == Opcode.CALL or any(isinstance(operand, NewObject) for operand in operands):
+                    leaf = False
+                if any(isinstance(operand, StackSlot) for operand in operands):
+                    slots = True
+            if not leaf:
+                frames[self.__code[start].direccion1] = "full"
+            else:
+                frames[self.__code[start].direccion1] = "leaf" if slots else "frameless"
+        return frames
+
+    def load_self(self, scratch):
+        # Registro con el objeto actual, para leer y escribir sp_GLOBAL: en el
+        # constructor es $s7, una funcion hoja no lo saca de $a0 y las demas
+        # lo tienen en 0($sp)
+        if self.current_func == "":
+            return "s7"
+        if self.current_frame != "full":
+            return "a0"
+        self.write(f"\tlw ${scratch}, 0($sp)")
+        return scratch
+
+    def move_self(self, dest):
+        # dest = self
+        current = self.load_self(dest)
+        if current != dest:
+            self.write(f"\tmove ${dest}, ${current}")
+
+    def frame_size(self, instruction):
+        # self en 0($sp) y sp[k] en k+4($sp)
+        size = 4
+        if instruction.size is not None:
+            size = instruction.size + 4
+        return size
+
+    def reserva_memoria_func(self, instruction):
+        self.write(f"# ======== INICIALIZAR DE MEMORIA FUNCION {instruction.direccion1} ========")
+        size = self.frame_size(instruction)
+        self.current_frame_size = size
+        if self.current_frame == "frameless":
+            return
+        if self.current_frame == "leaf":
+            self.write(f"\taddi $sp, $sp, -{size}")
+            return
+        self.write(f"\taddi $sp, $sp, -{size + 4}")
+        self.write(f"\tsw $ra, {size}($sp)") # return address arriba de las variables locales
+        self.write(f"\tsw $a0, 0($sp)")
+        self.write(f"\tmove $s1, $a0")
+
+    def libera_memoria_func(self):
+        # END FUNCTION no trae el SIZE: se usa el de la funcion actual
+        size = self.current_frame_size
+        if self.current_frame == "leaf":
+            self.write(f"\taddi $sp, $sp, {size}")
+        elif self.current_frame == "full":
+            self.write(f"\tlw $ra, {size}($sp)")
+            self.write(f"\taddi $sp, $sp, {size + 4}")
+
+    def reserva_memoria_main(self, instruction):
+        self.write(f"# ======== INICIALIZAR DE MEMORIA FUNCION {instruction.direccion1} ========")
         size = 0
 
-        for index, token in enumerate(tokens):
-            if token == 'SIZE':
-                size = int(tokens[index + 1]) + 4
-                break
+        if instruction.size is not None:
+            size = instruction.size + 4
 
         self.write(f"\taddi $sp, $sp, -{8}") # mover el stack pointer para hacer espacio para el $fp y $ra
         self.write(f"\tsw $fp, 0($sp)") # guardar el frame pointer en el stack
@@ -795,27 +1083,16 @@ class AssemblerConvertor:
         self.write("\tjal CLASS_Main")
 
 
-        self.write("# ======== FUNCIONES BASICAS ========")
-        self.write("out_int:")
-        self.write("\tli $v0, 1")
-        self.write("\tsyscall")
-        self.write("\tjr $ra\n")
-
-        self.write("out_string:")
-        self.write("\tli $v0, 4")
-        self.write("\tsyscall")
-        self.write("\tjr $ra\n")
-
-        self.write("in_int:")
-        self.write("\tli $v0, 5")
-        self.write("\tsyscall")
-        self.write("\tjr $ra\n")
+        # Solo las rutinas que el programa usa
+        used = self.runtime_routines()
 
-        self.write("in_string:")
-        self.write("\tli $v0, 8")
-        self.write("\tsyscall")
-
-        self.write("\tjr $ra\n")
+        self.write("# ======== FUNCIONES BASICAS ========")
+        for routine, syscall in (("out_int", 1), ("out_string", 4), ("in_int", 5), ("in_string", 8)):
+            if routine in used:
+                self.write(f"{routine}:")
+                self.write(f"\tli $v0, {syscall}")
+                self.write("\tsyscall")
+                self.write("\tjr $ra\n")
 
         save_restoree ="""
 save_registers:
@@ -846,7 +1123,8 @@ restore_registers:
     jr $ra
 
 """
-        self.write(save_restoree)
+        if "save_registers" in used:
+            self.write(save_restoree)
 
 
         clas_io = """
@@ -859,31 +1137,20 @@ CLASS_IO:
     syscall
     move $t8, $v0
 
-# ======== RESERVAR 3 BYTES EN EL HEAP ========
-    li $t7, 3
-    move $a0, $t7
-    li $v0, 9
-    syscall
-    move $t7, $v0
-
-# ======== ALMACENAR CADENA EN HEAP ========
-    li $t6, 73
-    sb $t6, 0($t7)
-    li $t6, 79
-    sb $t6, 1($t7)
-    sb $zero, 2($t7)
-
+# ======== DESCRIPTOR DE LA CLASE ========
+    la $t7, desc_IO
     sw $t7, 0($t8)
     move $s6, $s7
     move $s7, $t8
     jr $ra
-
+"""
+        substr = """
 substr:
     move $a0, $s1
     move $a1, $s2
     move $a2, $s3
-    li $s4, 0
-    add $s5, $s2, $s3
+    li $a3, 0
+    add $v1, $s2, $s3
 
 # ======== RESERVAR ESPACIO EN EL HEAP PARA LA NUEVA SUBCADENA ========
     addi $a2, $a2, 1
@@ -891,32 +1158,82 @@ substr:
     li $v0, 9
     syscall
     move $s6, $v0
-    move $t5, $s6
+    move $a1, $s6
 
 # ======== COPIAR LOS CARACTERES DE LA CADENA ORIGINAL A LA NUEVA SUBCADENA ========
 substr_loop:
-    beq $s4, $s5, substr_end
-    blt $s4, $s2, skip_char
+    beq $a3, $v1, substr_end
+    blt $a3, $s2, skip_char
 
 # ======== COPIAR CARACTERES ========
-    lb $t3, 0($s1)
-    sb $t3, 0($s6)
+    lb $a2, 0($s1)
+    sb $a2, 0($s6)
     addi $s6, $s6, 1
 
 # ======== SALTO DE CARACTERES ========
 skip_char:
-    addi $s4, $s4, 1
+    addi $a3, $a3, 1
     addi $s1, $s1, 1
     j substr_loop
 
 # ======== TERMINAR LA FUNCIÓN substr ========
 substr_end:
     sb $zero, 0($s6)
-    move $v0, $t5
+    move $v0, $a1
     jr $ra
 
-"""     
-        self.write(clas_io)
+"""
+        # copy: objeto nuevo del tamano que dice el descriptor, palabra por palabra
+        object_copy = """
+object_copy:
+    lw $s2, 0($s1)
+    lw $a0, 4($s2)
+    li $v0, 9
+    syscall
+    li $s3, 0
+
+object_copy_loop:
+    beq $s3, $a0, object_copy_end
+    add $t7, $s1, $s3
+    lw $t8, 0($t7)
+    add $t7, $v0, $s3
+    sw $t8, 0($t7)
+    addi $s3, $s3, 4
+    j object_copy_loop
+
+object_copy_end:
+    jr $ra
+"""
+        if "CLASS_IO" in used:
+            self.write(clas_io)
+        if "substr" in used:
+            self.write(substr)
+        if "copy" in used:
+            self.write(object_copy)
+
+    def runtime_routines(self):
+        # Rutinas de write_basic a las que salta el codigo: las de IO/String,
+        # copy de Object, CLASS_IO (new IO) y save/restore_registers (llamadas a metodos desde
+        # el constructor; en las funciones se guardan solo los vivos)
+        used = set()
+        inside = False
+        for instruction in self.__code:
+            if instruction.operador == Opcode.FUNCTION:
+                inside = True
+            elif instruction.operador == Opcode.END_FUNCTION:
+                inside = False
+            elif instruction.operador == Opcode.CALL:
+                method = instruction.direccion1.method
+                if method in self.reserved:
+                    used.add(method)
+                elif self.object_method(instruction.direccion1):
+                    used.add(method)
+                elif not inside:
+                    used.add("save_registers")
+            for operand in instruction.uses():
+                if isinstance(operand, NewObject) and operand.tipo == "IO":
+                    used.add("CLASS_IO")
+        return used
 
 
 
@@ -937,7 +1254,33 @@ substr_end:
                 formated_V_table += word
 
 
-        init = f".data\n{formated_V_table}\n.text\n"
+        # Descriptor de cada clase (solo lectura): nombre, tamano, padre y tabla virtual
+        formated_descriptors = ""
+        for key in self.v_table:
+            parent = self.hierarchy.parents.get(key)
+            formated_descriptors += f"desc_{key}:\n"
+            formated_descriptors += f"\t.word {self.string_label(key)}\n"
+            formated_descriptors += f"\t.word {self.object_size(key)}\n"
+            formated_descriptors += f"\t.word {f'desc_{parent}' if parent in self.v_table else 0}\n"
+            formated_descriptors += f"\t.word vt_{key}\n"
+        # Prototipo de cada clase: lo que NEW copia al objeto nuevo
+        formated_prototypes = ""
+        for key in self.v_table:
+            values = self.prototypes.get(key, {})
+            words = (self.object_size(key) + 3) // 4
+            formated_prototypes += f"proto_{key}:\n\t.word desc_{key}\n\t.word vt_{key}\n"
+            for offset in range(8, words * 4, 4):
+                value = self.prototype_word(values[offset]) if offset in values else 0
+                formated_prototypes += f"\t.word {value}\n"
+        if "CLASS_IO" in self.runtime_routines():
+            formated_descriptors += f"desc_IO:\n\t.word {self.string_label('IO')}\n\t.word 8\n\t.word 0\n\t.word 0\n"
+
+        formated_strings = ""
+        for cadena, label in self.strings.items():
+            escaped = cadena.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n").replace("\t", "\\t")
+            formated_strings += f"{label}:\t.asciiz \"{escaped}\"\n"
+
+        init = f".data\n{formated_V_table}\n{formated_descriptors}\n{formated_prototypes}\n{formated_strings}\n.text\n"
         with open(self.output, 'w') as file:
             file.write(init)
 
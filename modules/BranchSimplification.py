@@ -0,0 +1,140 @@
+from modules.Tripleta import Tripleta, Opcode, BRANCHES
+
+# IF <-> IFNOT
+INVERSE = {Opcode.IF: Opcode.IFNOT, Opcode.IFNOT: Opcode.IF}
+
+
+def jump_label(triplet):
+    # Etiqueta a la que salta (None si no es un salto)
+    if triplet.operador == Opcode.GOTO:
+        return triplet.direccion1
+    if triplet.operador in BRANCHES:
+        return triplet.direccion2
+    return None
+
+
+def with_label(triplet, label):
+    if triplet.operador == Opcode.GOTO:
+        return Tripleta(Opcode.GOTO, label)
+    return Tripleta(triplet.operador, triplet.direccion1, label)
+
+
+class BranchSimplification():
+    # Simplifica los saltos que deja TreeDirections:
+    #   IF c GOTO Lt / GOTO Lf / Lt:  ->  IFNOT c GOTO Lf / Lt:
+    # quita los saltos a la siguiente instruccion, sigue las cadenas de GOTO
+    # (un salto a una etiqueta que solo hace GOTO M salta directo a M), quita
+    # las etiquetas que nadie usa y el codigo despues de un GOTO hasta la
+    # siguiente etiqueta. Se repite hasta que no cambie nada
+    def __init__(self) -> None:
+        self.threaded = 0
+        self.inverted = 0
+        self.removed = 0
+
+    def run(self, body):
+        changed = True
+        while changed:
+            before = (self.threaded, self.inverted, self.removed)
+            body = self.thread_jumps(body)
+            body = self.invert_branches(body)
+            body = self.remove_jumps_to_next(body)
+            body = self.remove_unused_labels(body)
+            body = self.remove_after_goto(body)
+            changed = before != (self.threaded, self.inverted, self.removed)
+        return body
+
+    def labels_at(self, body, index):
+        # Etiquetas seguidas que empiezan en index
+        labels = set()
+        while index < len(body) and body[index].operador == Opcode.LABEL:
+            labels.add(body[index].direccion1)
+            index += 1
+        return labels
+
+    def thread_jumps(self, body):
+        positions = {}
+        for index, triplet in enumerate(body):
+            if triplet.operador == Opcode.LABEL:
+                positions[triplet.direccion1] = index
+
+        def final(label):
+            seen = {label}
+            index = positions[label]
+            while True:
+                while index < len(body) and body[index].operador == Opcode.LABEL:
+                    index += 1
+                if index == len(body) or body[index].operador != Opcode.GOTO:
+                    return label
+                following = body[index].direccion1
+                if following in seen:
+                    # Lazo infinito de GOTOs, se deja como esta
+                    return label
+                seen.add(following)
+                label = following
+                index = positions[label]
+
+        result = []
+        for triplet in body:
+            label = jump_label(triplet)
+            if label is not None:
+                target = final(label)
+                if target != label:
+                    self.threaded += 1
+                    triplet = with_label(triplet, target)
+            result.append(triplet)
+        return result
+
+    def invert_branches(self, body):
+        result = []
+        index = 0
+        while index < len(body):
+            triplet = body[index]
+            if (triplet.operador in BRANCHES and index + 1 < len(body)
+                    and body[index + 1].operador == Opcode.GOTO
+                    and triplet.direccion2 in self.labels_at(body, index + 2)):
+                self.inverted += 1
+                result.append(Tripleta(INVERSE[triplet.operador], triplet.direccion1, body[index + 1].direccion1))
+                index += 2
+                continue
+            result.append(triplet)
+            index += 1
+        return result
+
+    def remove_jumps_to_next(self, body):
+        # Un IF solo lee su condicion, se puede quitar igual que el GOTO
+        result = []
+        for index, triplet in enumerate(body):
+            label = jump_label(triplet)
+            if label is not None and label in self.labels_at(body, index + 1):
+                self.removed += 1
+                continue
+            result.append(triplet)
+        return result
+
+    def remove_unused_labels(self, body):
+        used = set()
+        for triplet in body:
+            label = jump_label(triplet)
+            if label is not None:
+                used.add(label)
+        result = []
+        for triplet in body:
+            if triplet.operador == Opcode.LABEL and triplet.direccion1 not in used:
+                self.removed += 1
+                continue
+            result.append(triplet)
+        return result
+
+    def remove_after_goto(self, body):
+        result = []
+        unreachable = False
+        for triplet in body:
+            if triplet.operador == Opcode.LABEL:
+                unreachable = False
+            elif unreachable:
+                self.removed += 1
+                continue
+            result.append(triplet)
+            if triplet.operador == Opcode.GOTO:
+                unreachable = True
+        return result
@@ -0,0 +1,69 @@
+from modules.Tripleta import Opcode
+from modules.Operand import NewObject
+
+
+class ClassHierarchy():
+    # Jerarquia de clases del programa sacada del 3D (CLASS ... INHERITS y los
+    # FUNCTION Clase.metodo). Sirve para saber a que metodo va una llamada sin
+    # ver el objeto en ejecucion
+    def __init__(self, code) -> None:
+        self.parents = {}     # clase -> clase padre (None si no hereda)
+        self.methods = {}     # clase -> metodos que define (no los heredados)
+        self.children = {}    # clase -> subclases directas
+        for triplet in code:
+            if triplet.operador == Opcode.CLASS:
+                self.parents[triplet.direccion1] = triplet.direccion2
+                self.methods.setdefault(triplet.direccion1, set())
+            elif triplet.operador == Opcode.FUNCTION:
+                class_name, method = triplet.direccion1.split(".", 1)
+                self.methods.setdefault(class_name, set()).add(method)
+        for class_name, parent in self.parents.items():
+            if parent is not None:
+                self.children.setdefault(parent, []).append(class_name)
+
+    def resolve(self, class_name, method):
+        # Clase cuya definicion de method usa un objeto de class_name (None si no hay)
+        while class_name is not None:
+            if method in self.methods.get(class_name, set()):
+                return class_name
+            class_name = self.parents.get(class_name)
+        return None
+
+    def is_overridden(self, class_name, method):
+        # Alguna subclase (directa o no) vuelve a definir method
+        pending = list(self.children.get(class_name, []))
+        while len(pending) > 0:
+            child = pending.pop()
+            if method in self.methods.get(child, set()):
+                return True
+            pending.extend(self.children.get(child, []))
+        return False
+
+    def descendants(self, class_name):
+        # class_name y todas sus subclases
+        found = [class_name]
+        for child in found:
+            found.extend(self.children.get(child, []))
+        return found
+
+    def target(self, class_name, method, exact = False):
+        # Funcion (Clase.metodo) a la que va la llamada sobre un objeto de tipo
+        # estatico class_name; None si depende de la subclase. exact: el tipo
+        # en ejecucion es class_name (new Tipo, @Tipo)
+        if class_name is None:
+            return None
+        defined = self.resolve(class_name, method)
+        if defined is None:
+            return None
+        if not exact and self.is_overridden(class_name, method):
+            return None
+        return f"{defined}.{method}"
+
+    def call_target(self, method):
+        # Funcion a la que va un CALL (MethodRef) si no depende del objeto en
+        # ejecucion; None si hay que buscarla en la tabla virtual
+        if method.at_type is not None:
+            return self.target(method.at_type, method.method, exact = True)
+        if isinstance(method.receiver, NewObject):
+            return self.target(method.receiver.tipo, method.method, exact = True)
+        return self.target(method.receiver_type(), method.method)
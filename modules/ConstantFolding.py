@@ -0,0 +1,165 @@
+from modules.Tripleta import Tripleta, Opcode, BINARY_OPS, UNARY_OPS, BRANCHES
+from modules.Temporal import Temporal
+from modules.Operand import StackSlot, Constant, NewObject, int_constant
+from modules.ControlFlowGraph import ControlFlowGraph
+
+
+def to32(value):
+    # Aritmetica de enteros de MIPS: 32 bits con signo, da la vuelta
+    value &= 0xFFFFFFFF
+    return value - (1 << 32) if value & 0x80000000 else value
+
+
+def is_value(operand):
+    # Constantes que se pueden propagar (Int y Bool; los String son punteros al heap)
+    return isinstance(operand, Constant) and not operand.is_string()
+
+
+def evaluate(op, a, b = None):
+    # Resultado de la operacion con constantes (None si no se puede calcular)
+    x = a.value
+    y = b.value if b is not None else None
+    if op == Opcode.NOT:
+        return Constant(not x) if isinstance(x, bool) else None
+    if op == Opcode.NEG:
+        return Constant(to32(-x)) if not isinstance(x, bool) else None
+    if op == Opcode.ISVOID:
+        return None
+    if op == Opcode.EQ:
+        return Constant(x == y) if type(x) == type(y) else None
+    if isinstance(x, bool) or isinstance(y, bool):
+        return None
+    if op == Opcode.PLUS:
+        return Constant(to32(x + y))
+    if op == Opcode.MINUS:
+        return Constant(to32(x - y))
+    if op == Opcode.MULT:
+        return Constant(to32(x * y))
+    if op == Opcode.DIV:
+        if y == 0:
+            return None
+        # div de MIPS trunca hacia cero
+        quotient = abs(x) // abs(y)
+        return Constant(to32(quotient if (x < 0) == (y < 0) else -quotient))
+    if op == Opcode.LT:
+        return Constant(x < y)
+    if op == Opcode.LE:
+        return Constant(x <= y)
+    return None
+
+
+def identity(op, a, b):
+    # Operando que queda de x+0, 0+x, x-0, x*1, 1*x y x/1 (None si no es una identidad)
+    if op == Opcode.PLUS:
+        if int_constant(b) == 0:
+            return a
+        if int_constant(a) == 0:
+            return b
+    elif op == Opcode.MULT:
+        if int_constant(b) == 1:
+            return a
+        if int_constant(a) == 1:
+            return b
+    elif op == Opcode.MINUS or op == Opcode.DIV:
+        if int_constant(b) == (0 if op == Opcode.MINUS else 1):
+            return a
+    return None
+
+
+class ConstantFolding():
+    # Propagacion de constantes (temporales y variables locales sp[k]) sobre el CFG
+    # y calculo en compilacion de las operaciones Int/Bool. Un IF con condicion
+    # constante se vuelve GOTO o desaparece; x+0, x*1 y parecidas quedan en un MOVE
+    def __init__(self) -> None:
+        self.folded = 0
+
+    def run(self, body):
+        cfg = ControlFlowGraph(body)
+        order = cfg.reverse_postorder()
+        state_out = [None] * len(cfg.blocks)
+        state_in = [{} for _ in cfg.blocks]
+
+        changed = True
+        while changed:
+            changed = False
+            for number in order:
+                state = self.meet(cfg, number, state_out)
+                state_in[number] = state
+                state = dict(state)
+                for triplet in cfg.blocks[number].triplets:
+                    self.transfer(self.rewrite(triplet, state), state)
+                if state != state_out[number]:
+                    state_out[number] = state
+                    changed = True
+
+        result = []
+        for block in cfg.blocks:
+            state = dict(state_in[block.number])
+            for triplet in block.triplets:
+                new = self.rewrite(triplet, state)
+                self.transfer(new, state)
+                if new is None or new.operador != triplet.operador:
+                    self.folded += 1
+                if new is not None:
+                    result.append(new)
+        return result
+
+    def meet(self, cfg, number, state_out):
+        # Solo se conserva lo que vale lo mismo en todos los predecesores ya visitados
+        if number == 0:
+            # La entrada no sabe nada de los parametros
+            return {}
+        state = None
+        for predecessor in cfg.blocks[number].predecessors:
+            other = state_out[predecessor]
+            if other is None:
+                continue
+            if state is None:
+                state = dict(other)
+            else:
+                state = {var: value for var, value in state.items() if other.get(var) == value}
+        return state if state is not None else {}
+
+    def rewrite(self, triplet, state):
+        # Cambia las lecturas conocidas por constantes y calcula lo que se pueda
+        def use(operand):
+            if isinstance(operand, (Temporal, StackSlot)) and operand in state:
+                return state[operand]
+            return operand
+
+        op = triplet.operador
+        if op == Opcode.CALL or op == Opcode.LOAD_PARAM:
+            return triplet
+        new = triplet.map_operands(use, lambda operand: operand)
+
+        if op in BINARY_OPS and is_value(new.direccion1) and is_value(new.direccion2):
+            value = evaluate(op, new.direccion1, new.direccion2)
+            if value is not None:
+                return Tripleta(Opcode.MOVE, value, destino=new.destino)
+        elif op in BINARY_OPS and identity(op, new.direccion1, new.direccion2) is not None:
+            return Tripleta(Opcode.MOVE, identity(op, new.direccion1, new.direccion2), destino=new.destino)
+        elif op in UNARY_OPS and is_value(new.direccion1):
+            value = evaluate(op, new.direccion1)
+            if value is not None:
+                return Tripleta(Opcode.MOVE, value, destino=new.destino)
+        elif op in BRANCHES and is_value(new.direccion1):
+            if new.direccion1.value == (op == Opcode.IF):
+                return Tripleta(Opcode.GOTO, new.direccion2)
+            return None
+        return new
+
+    def transfer(self, triplet, state):
+        if triplet is None:
+            return
+        written = triplet.defines()
+        if triplet.operador == Opcode.ASSIGN and isinstance(triplet.direccion1, NewObject):
+            # El constructor puede escribir en el frame actual
+            for var in [var for var in state if isinstance(var, StackSlot)]:
+                del state[var]
+        if not isinstance(written, (Temporal, StackSlot)):
+            return
+        value = triplet.direccion1
+        if triplet.operador in (Opcode.MOVE, Opcode.ASSIGN) and is_value(value):
+            state[written] = value
+        else:
+            state.pop(written, None)
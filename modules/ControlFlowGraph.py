@@ -0,0 +1,235 @@
+from modules.Tripleta import Opcode, BRANCHES
+
+
+class BasicBlock():
+    # Rango [start, end) de tripletas del cuerpo de la funcion
+    __slots__ = ('number', 'start', 'end', 'triplets', 'successors', 'predecessors')
+
+    def __init__(self, number, start, end, triplets) -> None:
+        self.number = number
+        self.start = start
+        self.end = end
+        self.triplets = triplets
+        self.successors = []
+        self.predecessors = []
+
+    def label(self):
+        # Etiqueta con la que empieza el bloque (None si no tiene)
+        if len(self.triplets) > 0 and self.triplets[0].operador == Opcode.LABEL:
+            return self.triplets[0].direccion1
+        return None
+
+    def last(self):
+        return self.triplets[-1] if len(self.triplets) > 0 else None
+
+    def __repr__(self):
+        return f"<BasicBlock B{self.number} [{self.start}, {self.end}) -> {self.successors}>"
+
+
+class Loop():
+    # Lazo natural: header domina a todos los bloques de body
+    __slots__ = ('header', 'body', 'back_edges', 'parent', 'children', 'depth')
+
+    def __init__(self, header) -> None:
+        self.header = header
+        self.body = {header}
+        self.back_edges = []
+        self.parent = None
+        self.children = []
+        self.depth = 1
+
+    def __repr__(self):
+        return f"<Loop B{self.header} {sorted(self.body)} depth {self.depth}>"
+
+
+class ControlFlowGraph():
+    # Bloques basicos del cuerpo de una funcion (tripletas entre FUNCTION y
+    # END FUNCTION) con sucesores/predecesores, arbol de dominadores y lazos.
+    # El bloque 0 es la entrada
+    def __init__(self, code) -> None:
+        self.code = code
+        self.blocks = []
+        self.labels = {}          # Label -> numero de bloque
+        self.idom = []            # dominador inmediato de cada bloque (None en la entrada)
+        self.dominator_children = []
+        self.loops = []           # lazos naturales, los de afuera primero
+        self.loop_of = []         # lazo mas interno de cada bloque (None si no esta en uno)
+        self.build_blocks()
+        self.build_dominators()
+        self.build_loops()
+
+    def build_blocks(self):
+        leaders = {0}
+        for index, triplet in enumerate(self.code):
+            if triplet.operador == Opcode.LABEL:
+                leaders.add(index)
+            elif triplet.operador in BRANCHES or triplet.operador == Opcode.GOTO:
+                leaders.add(index + 1)
+
+        starts = sorted(leader for leader in leaders if leader < len(self.code))
+        for number, start in enumerate(starts):
+            end = starts[number + 1] if number + 1 < len(starts) else len(self.code)
+            block = BasicBlock(number, start, end, self.code[start:end])
+            self.blocks.append(block)
+            if block.label() is not None:
+                self.labels[block.label()] = number
+
+        for block in self.blocks:
+            last = block.last()
+            if last.operador == Opcode.GOTO:
+                block.successors.append(self.labels[last.direccion1])
+            else:
+                if last.operador in BRANCHES:
+                    block.successors.append(self.labels[last.direccion2])
+                if block.number + 1 < len(self.blocks) and block.number + 1 not in block.successors:
+                    block.successors.append(block.number + 1)
+            for successor in block.successors:
+                self.blocks[successor].predecessors.append(block.number)
+
+    def reverse_postorder(self):
+        # Orden de recorrido para dataflow hacia adelante; solo los bloques alcanzables
+        order = []
+        visited = set()
+        if len(self.blocks) == 0:
+            return order
+        stack = [(0, iter(self.blocks[0].successors))]
+        visited.add(0)
+        while len(stack) > 0:
+            number, successors = stack[-1]
+            for successor in successors:
+                if successor not in visited:
+                    visited.add(successor)
+                    stack.append((successor, iter(self.blocks[successor].successors)))
+                    break
+            else:
+                stack.pop()
+                order.append(number)
+        order.reverse()
+        return order
+
+    def reachable(self):
+        return set(self.reverse_postorder())
+
+    def build_dominators(self):
+        # Cooper, Harvey y Kennedy: iterar idom en reverse postorder
+        order = self.reverse_postorder()
+        position = {number: index for index, number in enumerate(order)}
+        self.idom = [None] * len(self.blocks)
+        if len(order) == 0:
+            self.dominator_children = []
+            return
+        self.idom[0] = 0
+
+        def intersect(a, b):
+            while a != b:
+                while position[a] > position[b]:
+                    a = self.idom[a]
+                while position[b] > position[a]:
+                    b = self.idom[b]
+            return a
+
+        changed = True
+        while changed:
+            changed = False
+            for number in order[1:]:
+                new_idom = None
+                for predecessor in self.blocks[number].predecessors:
+                    if self.idom[predecessor] is None:
+                        continue
+                    new_idom = predecessor if new_idom is None else intersect(predecessor, new_idom)
+                if new_idom != self.idom[number]:
+                    self.idom[number] = new_idom
+                    changed = True
+
+        self.idom[0] = None
+        self.dominator_children = [[] for _ in self.blocks]
+        for number, parent in enumerate(self.idom):
+            if parent is not None:
+                self.dominator_children[parent].append(number)
+
+    def dominates(self, a, b):
+        # a domina a b (todo camino desde la entrada a b pasa por a)
+        while b is not None:
+            if a == b:
+                return True
+            b = self.idom[b]
+        return False
+
+    def build_loops(self):
+        # Una arista b -> h es de regreso si h domina a b; el lazo natural son los
+        # bloques que llegan a b sin pasar por h. Lazos con el mismo header se unen
+        reachable = self.reachable()
+        by_header = {}
+        for block in self.blocks:
+            if block.number not in reachable:
+                continue
+            for successor in block.successors:
+                if self.dominates(successor, block.number):
+                    loop = by_header.get(successor)
+                    if loop is None:
+                        loop = Loop(successor)
+                        by_header[successor] = loop
+                    loop.back_edges.append(block.number)
+                    stack = [block.number]
+                    while len(stack) > 0:
+                        number = stack.pop()
+                        if number not in loop.body:
+                            loop.body.add(number)
+                            stack.extend(self.blocks[number].predecessors)
+
+        # Anidamiento: el padre es el lazo mas chico que contiene al header
+        self.loops = sorted(by_header.values(), key=lambda loop: -len(loop.body))
+        for index, loop in enumerate(self.loops):
+            for outer in reversed(self.loops[:index]):
+                if loop.header in outer.body and loop.body <= outer.body:
+                    loop.parent = outer
+                    outer.children.append(loop)
+                    loop.depth = outer.depth + 1
+                    break
+
+        self.loop_of = [None] * len(self.blocks)
+        for loop in self.loops:
+            for number in loop.body:
+                self.loop_of[number] = loop
+
+    def preheader(self, loop):
+        # Posicion donde se insertan tripletas que corren una vez antes del lazo:
+        # al final del unico bloque de afuera que entra al header, si solo va
+        # al header (None si el lazo no tiene preheader)
+        outside = [number for number in self.blocks[loop.header].predecessors if number not in loop.body]
+        if len(outside) != 1:
+            return None
+        block = self.blocks[outside[0]]
+        if block.successors != [loop.header]:
+            return None
+        if block.last().operador == Opcode.GOTO:
+            return block.end - 1
+        if block.last().operador in BRANCHES:
+            return None
+        return block.end
+
+    def loop_depth(self, number):
+        loop = self.loop_of[number]
+        return loop.depth if loop is not None else 0
+
+    def dump(self):
+        # Texto para depurar: bloques, aristas, dominadores y lazos
+        lines = []
+        for block in self.blocks:
+            lines.append(f"B{block.number} [{block.start}, {block.end}) preds {block.predecessors} succs {block.successors} idom {self.idom[block.number]} depth {self.loop_depth(block.number)}")
+            for triplet in block.triplets:
+                lines.append(f"\t{triplet}")
+        return '\n'.join(lines) + '\n'
+
+
+def split_functions(code):
+    # (indice de FUNCTION, indice de END FUNCTION) de cada funcion del programa
+    functions = []
+    start = None
+    for index, triplet in enumerate(code):
+        if triplet.operador == Opcode.FUNCTION:
+            start = index
+        elif triplet.operador == Opcode.END_FUNCTION and start is not None:
+            functions.append((start, index))
+            start = None
+    return functions
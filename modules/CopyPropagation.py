@@ -0,0 +1,72 @@
+from modules.Tripleta import Opcode
+from modules.Temporal import Temporal
+from modules.Operand import StackSlot, GlobalSlot, Constant, NewObject
+from modules.ControlFlowGraph import ControlFlowGraph
+
+
+def is_copy_source(operand):
+    # Lo que se puede leer en lugar de la copia: un temporal o una constante
+    # (los String son una etiqueta en .data, leerlos otra vez es un la)
+    return isinstance(operand, (Temporal, Constant))
+
+
+class CopyPropagation():
+    # Propagacion de copias dentro de cada bloque basico. Despues de t0 = t1
+    # las lecturas de t0 leen t1, y despues de ASSIGN sp[k] x (o sp_GLOBAL[k])
+    # las lecturas del slot leen x sin pasar por memoria. Las copias que quedan
+    # sin usar las quita DeadCodeElimination. El receptor de un CALL no se cambia
+    # (el dispatch usa el tipo del slot)
+    def __init__(self) -> None:
+        self.propagated = 0
+        self.forwarded = 0
+
+    def run(self, body):
+        cfg = ControlFlowGraph(body)
+        result = []
+        for block in cfg.blocks:
+            copies = {}
+            for triplet in block.triplets:
+                new = self.rewrite(triplet, copies)
+                self.transfer(new, copies)
+                # t0 = t0 no hace nada
+                if new.operador == Opcode.MOVE and new.direccion1 == new.destino:
+                    continue
+                result.append(new)
+        return result
+
+    def rewrite(self, triplet, copies):
+        if triplet.operador == Opcode.CALL or triplet.operador == Opcode.LOAD_PARAM:
+            return triplet
+
+        def use(operand):
+            if isinstance(operand, (Temporal, StackSlot, GlobalSlot)) and operand in copies:
+                if isinstance(operand, Temporal):
+                    self.propagated += 1
+                else:
+                    self.forwarded += 1
+                return copies[operand]
+            return operand
+
+        return triplet.map_operands(use, lambda operand: operand)
+
+    def transfer(self, triplet, copies):
+        op = triplet.operador
+        if op == Opcode.CALL:
+            # El metodo puede cambiar los atributos de self
+            self.kill(copies, lambda var: isinstance(var, GlobalSlot))
+        elif op == Opcode.ASSIGN and isinstance(triplet.direccion1, NewObject):
+            # El constructor puede escribir en el frame actual
+            self.kill(copies, lambda var: isinstance(var, (StackSlot, GlobalSlot)))
+
+        written = triplet.defines()
+        if written is None:
+            return
+        # Las copias que leian lo que se escribe ya no valen
+        self.kill(copies, lambda var: var == written or copies[var] == written)
+        value = triplet.direccion1
+        if op in (Opcode.MOVE, Opcode.ASSIGN) and is_copy_source(value) and value != written:
+            copies[written] = value
+
+    def kill(self, copies, condition):
+        for var in [var for var in copies if condition(var)]:
+            del copies[var]
@@ -0,0 +1,54 @@
+from modules.Tripleta import Opcode, BINARY_OPS, UNARY_OPS
+from modules.Temporal import Temporal
+from modules.Operand import StackSlot, NewObject
+from modules.ControlFlowGraph import ControlFlowGraph
+from modules.Liveness import Liveness
+
+
+class DeadCodeElimination():
+    # Quita los bloques a los que no se llega desde la entrada, los temporales
+    # que se calculan y nadie lee, y los ASSIGN a sp[k] que no se vuelven a leer.
+    # Se repite hasta que no cambie nada (quitar una tripleta puede matar otras)
+    def __init__(self) -> None:
+        self.removed = 0
+
+    def run(self, body):
+        changed = True
+        while changed:
+            before = len(body)
+            body = self.remove_unreachable(body)
+            body = self.remove_dead(body)
+            changed = len(body) != before
+            self.removed += before - len(body)
+        return body
+
+    def remove_unreachable(self, body):
+        cfg = ControlFlowGraph(body)
+        reachable = cfg.reachable()
+        result = []
+        for block in cfg.blocks:
+            if block.number in reachable:
+                result.extend(block.triplets)
+        return result
+
+    def remove_dead(self, body):
+        live_after = Liveness(body, tracked=(Temporal, StackSlot)).live_after()
+        result = []
+        for position, triplet in enumerate(body):
+            if self.is_dead(triplet, live_after[position]):
+                continue
+            result.append(triplet)
+        return result
+
+    def is_dead(self, triplet, live):
+        op = triplet.operador
+        written = triplet.defines()
+        if written is None or written in live:
+            return False
+        # El CALL se queda aunque no se use el resultado
+        if op in BINARY_OPS or op in UNARY_OPS or op == Opcode.MOVE:
+            return isinstance(written, Temporal)
+        if op == Opcode.ASSIGN or op == Opcode.LOAD_PARAM:
+            # El NEW corre el constructor
+            return isinstance(written, StackSlot) and not isinstance(triplet.direccion1, NewObject)
+        return False
@@ -0,0 +1,125 @@
+from modules.Tripleta import Opcode
+from modules.Temporal import Temporal
+from modules.RegisterAllocator import RegisterAllocator
+
+
+class GraphColoringAllocator(RegisterAllocator):
+    # Asignacion de registros para -O2 (Chaitin/Briggs): grafo de interferencia,
+    # coalescing conservador de los tX = tY, simplify/select con spill optimista.
+    # Reescribe el codigo igual que RegisterAllocator; los moves coalescidos
+    # quedan con origen y destino en el mismo registro y no se generan
+
+    def assign(self, liveness, clobbers, calls = ()):
+        body = liveness.code
+        live_after = liveness.live_after()
+        graph = {}
+        moves = []
+        # Los que siguen vivos despues de un NEW solo pueden ir en $s, los que
+        # siguen vivos despues de un CALL prefieren $s
+        only_saved = set()
+        across_calls = set()
+
+        def node(temp):
+            if temp not in graph:
+                graph[temp] = set()
+
+        for position, triplet in enumerate(body):
+            for operand in triplet.uses():
+                if isinstance(operand, Temporal):
+                    node(operand)
+            if position in clobbers:
+                only_saved |= live_after[position]
+            if position in calls:
+                across_calls |= live_after[position] - {triplet.defines()}
+
+            written = triplet.defines()
+            if not isinstance(written, Temporal):
+                continue
+            node(written)
+            source = None
+            if triplet.operador == Opcode.MOVE and isinstance(triplet.direccion1, Temporal):
+                source = triplet.direccion1
+                moves.append((written, source))
+            for other in live_after[position]:
+                if other != written and other != source:
+                    node(other)
+                    graph[written].add(other)
+                    graph[other].add(written)
+
+        alias = self.coalesce(graph, moves, only_saved)
+        colors, spilled = self.color(graph, only_saved, across_calls)
+
+        assignment = {}
+        for temp in alias:
+            representative = self.find(alias, temp)
+            if representative in colors:
+                assignment[temp] = colors[representative]
+        spilled = [temp for temp in alias if self.find(alias, temp) in spilled]
+        return assignment, spilled
+
+    def find(self, alias, temp):
+        while alias[temp] != temp:
+            temp = alias[temp]
+        return temp
+
+    def coalesce(self, graph, moves, only_saved):
+        # Briggs: se unen a y b si no interfieren y el nodo resultante tiene
+        # menos de K vecinos de grado significativo (>= K)
+        k = len(self.registers)
+        alias = {temp: temp for temp in graph}
+        changed = True
+        while changed:
+            changed = False
+            for a, b in moves:
+                a = self.find(alias, a)
+                b = self.find(alias, b)
+                if a == b or b in graph[a]:
+                    continue
+                if (a in only_saved) != (b in only_saved):
+                    continue
+                neighbors = graph[a] | graph[b]
+                significant = [other for other in neighbors if len(graph[other]) >= k]
+                if len(significant) >= k:
+                    continue
+
+                alias[b] = a
+                for other in graph.pop(b):
+                    graph[other].discard(b)
+                    graph[other].add(a)
+                    graph[a].add(other)
+                changed = True
+        return alias
+
+    def color(self, graph, only_saved, across_calls = ()):
+        k = len(self.registers)
+        degree = {temp: len(graph[temp]) for temp in graph}
+        remaining = set(graph)
+        stack = []
+        while len(remaining) > 0:
+            low = [temp for temp in remaining if degree[temp] < k]
+            if len(low) > 0:
+                temp = min(low, key=lambda temp: temp.number)
+            else:
+                # Spill optimista: se saca el de mayor grado y se intenta colorear igual
+                temp = max(remaining, key=lambda temp: (degree[temp], temp.number))
+            remaining.remove(temp)
+            stack.append(temp)
+            for other in graph[temp]:
+                if other in remaining:
+                    degree[other] -= 1
+
+        colors = {}
+        spilled = set()
+        while len(stack) > 0:
+            temp = stack.pop()
+            taken = {colors[other] for other in graph[temp] if other in colors}
+            available = [name for name in self.registers if name not in taken]
+            if temp in only_saved:
+                available = [name for name in available if name.startswith("s")]
+            elif temp in across_calls:
+                available.sort(key=lambda name: not name.startswith("s"))
+            if len(available) > 0:
+                colors[temp] = available[0]
+            else:
+                spilled.add(temp)
+        return colors, spilled
@@ -0,0 +1,167 @@
+from modules.Tripleta import Tripleta, Opcode, BRANCHES, next_temp_number
+from modules.Temporal import Temporal
+from modules.Operand import StackSlot, GlobalSlot, Constant, Label, NewObject, SelfRef
+from modules.ControlFlowGraph import ControlFlowGraph, split_functions
+from modules.ClassHierarchy import ClassHierarchy
+
+
+class Inliner():
+    # Cambia las llamadas a metodos chicos por el cuerpo del metodo. Solo si se
+    # sabe a que metodo va la llamada: nadie lo redefine abajo del tipo estatico
+    # del receptor, o es un dispatch @Tipo. Los sp[k] del metodo van a un espacio
+    # nuevo al final del frame (SIZE crece), los temporales y etiquetas se
+    # renombran y el RETURN se vuelve MOVE al temporal del CALL. Si el receptor
+    # no es self el metodo no puede usar sp_GLOBAL, self ni llamadas sobre self
+    MAX_SIZE = 8            # tripletas del cuerpo del metodo
+    MAX_SIZE_IN_LOOP = 16   # dentro de un lazo la llamada se hace muchas veces
+
+    def __init__(self, code) -> None:
+        self.code = code
+        self.hierarchy = ClassHierarchy(code)
+        self.functions = {}     # Clase.metodo -> (FUNCTION, cuerpo)
+        for start, end in split_functions(code):
+            self.functions[code[start].direccion1] = (code[start], code[start + 1:end])
+        # funcion -> metodos que se metieron en ella
+        self.report = {}
+        self.expanded = 0
+
+    def inline(self):
+        # Regresa el codigo nuevo; lo de fuera de las funciones queda igual
+        result = []
+        previous = 0
+        for start, end in split_functions(self.code):
+            result.extend(self.code[previous:start])
+            header, body = self.inline_function(self.code[start], self.code[start + 1:end])
+            result.append(header)
+            result.extend(body)
+            result.append(self.code[end])
+            previous = end + 1
+        result.extend(self.code[previous:])
+        return result
+
+    def inline_function(self, header, body):
+        name = header.direccion1
+        cfg = ControlFlowGraph(body)
+        depth = [0] * len(body)
+        for block in cfg.blocks:
+            for position in range(block.start, block.end):
+                depth[position] = cfg.loop_depth(block.number)
+
+        # Los metodos que se meten comparten el espacio despues de SIZE: sus
+        # sp[k] siempre se escriben antes de leerse
+        size = header.size if header.size is not None else 0
+        extra = 0
+        next_temp = next_temp_number(body)
+        result = []
+        for position, triplet in enumerate(body):
+            callee = self.callee(triplet, name, depth[position])
+            if callee is None:
+                result.append(triplet)
+                continue
+            count = triplet.direccion2
+            params = result[len(result) - count:] if count > 0 else []
+            args = [param.direccion1 for param in params]
+            if any(param.operador != Opcode.PARAM for param in params) or not self.can_pass(args):
+                result.append(triplet)
+                continue
+            del result[len(result) - count:]
+            expansion, temps = self.expand(callee, args, triplet.destino, size, next_temp)
+            result.extend(expansion)
+            next_temp += temps
+            callee_size = self.functions[callee][0].size
+            extra = max(extra, callee_size if callee_size is not None else 0)
+            self.report.setdefault(name, []).append(callee)
+
+        if extra > 0:
+            header = Tripleta(Opcode.FUNCTION, name, size=size + extra)
+        return header, result
+
+    def callee(self, triplet, caller, depth):
+        # Funcion que se puede meter en lugar del CALL (None si no)
+        if triplet.operador != Opcode.CALL:
+            return None
+        method = triplet.direccion1
+        same_object = method.is_self_call()
+        if isinstance(method.receiver, NewObject):
+            # El constructor tiene que correr igual
+            return None
+        target = self.hierarchy.call_target(method)
+        if target is None or target == caller or target not in self.functions:
+            return None
+
+        header, body = self.functions[target]
+        limit = self.MAX_SIZE if depth == 0 else self.MAX_SIZE_IN_LOOP
+        if len(body) > limit or target == "Main.main":
+            return None
+        if not self.can_inline(body, target, same_object):
+            return None
+        params = sum(1 for callee_triplet in body if callee_triplet.operador == Opcode.LOAD_PARAM)
+        count = triplet.direccion2
+        if params != count:
+            return None
+        return target
+
+    def can_pass(self, args):
+        # Los argumentos pasan con ASSIGN sp[k] x, que no sabe copiar self ni NEW
+        return all(isinstance(arg, (Temporal, StackSlot, GlobalSlot, Constant)) for arg in args)
+
+    def can_inline(self, body, name, same_object):
+        # Un solo RETURN al final con algo que se pueda copiar a un temporal
+        returns = [triplet for triplet in body if triplet.operador == Opcode.RETURN]
+        if len(returns) != 1 or body[-1].operador != Opcode.RETURN:
+            return False
+        value = body[-1].direccion1
+        if not isinstance(value, (Temporal, StackSlot, GlobalSlot, Constant)):
+            return False
+
+        for triplet in body:
+            if triplet.operador == Opcode.ASSIGN and isinstance(triplet.direccion1, NewObject):
+                return False
+            if triplet.operador == Opcode.CALL:
+                method = triplet.direccion1
+                if method.is_self_call():
+                    # Recursion, o una llamada sobre un self que ya no es el mismo
+                    if not same_object or self.hierarchy.target(method.receiver, method.method) in (name, None):
+                        return False
+            if not same_object:
+                for operand in triplet.uses() + [triplet.defines()]:
+                    if isinstance(operand, (GlobalSlot, SelfRef)):
+                        return False
+        return True
+
+    def expand(self, callee, args, result, base, next_temp):
+        # Cuerpo del metodo con los operandos renombrados; regresa tambien
+        # cuantos temporales nuevos usa
+        body = self.functions[callee][1]
+        self.expanded += 1
+        temps = {}
+        labels = {}
+
+        def rename(operand):
+            if isinstance(operand, Temporal):
+                if operand not in temps:
+                    temps[operand] = Temporal(next_temp + len(temps))
+                return temps[operand]
+            if isinstance(operand, StackSlot):
+                return StackSlot(base + operand.index, operand.tipo)
+            return operand
+
+        def label(old):
+            if old not in labels:
+                labels[old] = Label(f"{old.name}_INLINE{self.expanded}")
+            return labels[old]
+
+        expansion = []
+        for triplet in body:
+            op = triplet.operador
+            if op == Opcode.LOAD_PARAM:
+                expansion.append(Tripleta(Opcode.ASSIGN, args[triplet.direccion1.index], destino=rename(triplet.destino)))
+            elif op == Opcode.RETURN:
+                expansion.append(Tripleta(Opcode.MOVE, rename(triplet.direccion1), destino=result))
+            elif op == Opcode.LABEL or op == Opcode.GOTO:
+                expansion.append(Tripleta(op, label(triplet.direccion1)))
+            elif op in BRANCHES:
+                expansion.append(Tripleta(op, rename(triplet.direccion1), label(triplet.direccion2)))
+            else:
+                expansion.append(triplet.map_operands(rename, rename))
+        return expansion, len(temps)
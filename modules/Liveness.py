@@ -0,0 +1,92 @@
+from modules.Tripleta import Opcode
+from modules.Temporal import Temporal
+from modules.ControlFlowGraph import ControlFlowGraph
+
+
+class Liveness():
+    # Vida de los temporales dentro del cuerpo de una funcion (tripletas entre
+    # FUNCTION y END FUNCTION). Se resuelve live_in/live_out por bloque del CFG
+    # hacia atras hasta que no cambie nada
+    def __init__(self, code, cfg = None, tracked = (Temporal,)) -> None:
+        self.code = code
+        self.cfg = cfg if cfg is not None else ControlFlowGraph(code)
+        # Tipos de operando que se siguen (temporales, y sp[k] para stores muertos)
+        self.tracked = tracked
+        self.live_in = []
+        self.live_out = []
+        self.solve()
+
+    def solve(self):
+        uses = []
+        defs = []
+        blocks = self.cfg.blocks
+        for block in blocks:
+            block_uses = set()
+            block_defs = set()
+            for triplet in block.triplets:
+                for operand in triplet.uses():
+                    if isinstance(operand, self.tracked) and operand not in block_defs:
+                        block_uses.add(operand)
+                written = triplet.defines()
+                if isinstance(written, self.tracked):
+                    block_defs.add(written)
+            uses.append(block_uses)
+            defs.append(block_defs)
+
+        self.live_in = [set() for _ in blocks]
+        self.live_out = [set() for _ in blocks]
+        changed = True
+        while changed:
+            changed = False
+            for number in reversed(range(len(blocks))):
+                live_out = set()
+                for successor in blocks[number].successors:
+                    live_out |= self.live_in[successor]
+                live_in = uses[number] | (live_out - defs[number])
+                if live_out != self.live_out[number] or live_in != self.live_in[number]:
+                    self.live_out[number] = live_out
+                    self.live_in[number] = live_in
+                    changed = True
+
+    def live_after(self):
+        # Temporales vivos despues de cada tripleta
+        live_after = [None] * len(self.code)
+        for block in self.cfg.blocks:
+            live = set(self.live_out[block.number])
+            for position in reversed(range(block.start, block.end)):
+                live_after[position] = set(live)
+                triplet = self.code[position]
+                written = triplet.defines()
+                if isinstance(written, self.tracked):
+                    live.discard(written)
+                for operand in triplet.uses():
+                    if isinstance(operand, self.tracked):
+                        live.add(operand)
+        return live_after
+
+    def intervals(self):
+        # Intervalo [primera, ultima] posicion donde vive cada temporal
+        intervals = {}
+
+        def extend(temp, position):
+            if temp in intervals:
+                interval = intervals[temp]
+                interval[0] = min(interval[0], position)
+                interval[1] = max(interval[1], position)
+            else:
+                intervals[temp] = [position, position]
+
+        for block in self.cfg.blocks:
+            for temp in self.live_in[block.number]:
+                extend(temp, block.start)
+            for temp in self.live_out[block.number]:
+                extend(temp, block.end - 1)
+            for position in range(block.start, block.end):
+                triplet = self.code[position]
+                for operand in triplet.uses():
+                    if isinstance(operand, self.tracked):
+                        extend(operand, position)
+                written = triplet.defines()
+                if isinstance(written, self.tracked):
+                    extend(written, position)
+        return intervals
@@ -0,0 +1,153 @@
+from modules.Tripleta import Tripleta, Opcode, BINARY_OPS, UNARY_OPS, next_temp_number
+from modules.Temporal import Temporal
+from modules.Operand import StackSlot, GlobalSlot, NewObject
+from modules.ControlFlowGraph import ControlFlowGraph
+from modules.ConstantFolding import is_value
+from modules.Liveness import Liveness
+
+
+class LoopInvariantCodeMotion():
+    # Saca de los lazos lo que vale lo mismo en todas las vueltas y lo pone en el
+    # preheader (el unico bloque de afuera que entra al header). Se mueven:
+    #  - operaciones y MOVEs a un temporal cuyos operandos no cambian en el lazo.
+    #    Si el temporal se vuelve a escribir en el lazo (TreeDirections reusa los
+    #    temporales) la operacion sale a un temporal nuevo y adentro queda la copia
+    #  - lecturas de sp[k] / sp_GLOBAL[k] que nadie escribe en el lazo, que se
+    #    cargan una vez en un temporal nuevo
+    # Los CALL se quedan donde estan; un CALL en el lazo hace variantes a los
+    # sp_GLOBAL y un NEW a todos los slots
+    def __init__(self) -> None:
+        self.hoisted = 0
+        self.promoted = 0
+
+    def run(self, body):
+        changed = True
+        while changed:
+            changed = False
+            cfg = ControlFlowGraph(body)
+            liveness = Liveness(body, cfg)
+            # Los de adentro primero: lo que salen puede volver a salir del de afuera
+            for loop in sorted(cfg.loops, key=lambda loop: -loop.depth):
+                new_body = self.hoist(body, cfg, liveness, loop)
+                if new_body is not None:
+                    body = new_body
+                    changed = True
+                    break
+        return body
+
+    def hoist(self, body, cfg, liveness, loop):
+        insert_at = cfg.preheader(loop)
+        if insert_at is None:
+            return None
+
+        positions = []
+        for number in sorted(loop.body):
+            block = cfg.blocks[number]
+            positions.extend(range(block.start, block.end))
+
+        definitions = {}
+        has_call = False
+        has_new = False
+        for position in positions:
+            triplet = body[position]
+            written = triplet.defines()
+            if written is not None:
+                definitions[written] = definitions.get(written, 0) + 1
+            if triplet.operador == Opcode.CALL:
+                has_call = True
+            elif triplet.operador == Opcode.ASSIGN and isinstance(triplet.direccion1, NewObject):
+                has_new = True
+
+        # Lo que se usa al salir del lazo o al entrar al header no se puede mover
+        blocked = set(liveness.live_in[loop.header])
+        for number in loop.body:
+            for successor in cfg.blocks[number].successors:
+                if successor not in loop.body:
+                    blocked |= liveness.live_in[successor]
+
+        def invariant_slot(operand):
+            if definitions.get(operand, 0) > 0 or has_new:
+                return False
+            return isinstance(operand, StackSlot) or (isinstance(operand, GlobalSlot) and not has_call)
+
+        hoisted = set()
+        next_temp = next_temp_number(body)
+
+        def invariant(operand):
+            if is_value(operand):
+                return True
+            if isinstance(operand, Temporal):
+                return definitions.get(operand, 0) == 0 or operand in hoisted
+            return invariant_slot(operand)
+
+        moved = []              # posiciones que salen, en el orden en que se encontraron
+        renamed = {}            # posicion -> temporal nuevo donde queda el valor
+        changed = True
+        while changed:
+            changed = False
+            for position in positions:
+                if position in moved:
+                    continue
+                triplet = body[position]
+                op = triplet.operador
+                if not (op in BINARY_OPS or op in UNARY_OPS or op == Opcode.MOVE):
+                    continue
+                written = triplet.defines()
+                if not isinstance(written, Temporal):
+                    continue
+                if not all(invariant(operand) for operand in triplet.uses()):
+                    continue
+                # Se calcula aunque el lazo no de ninguna vuelta: no dividir entre 0
+                if op == Opcode.DIV and not (is_value(triplet.direccion2) and triplet.direccion2.value != 0):
+                    continue
+                if definitions[written] == 1 and written not in blocked:
+                    hoisted.add(written)
+                elif op != Opcode.MOVE:
+                    renamed[position] = Temporal(next_temp)
+                    next_temp += 1
+                else:
+                    # Una copia a un temporal que cambia se queda adentro
+                    continue
+                moved.append(position)
+                changed = True
+
+        # Slots que se leen en el lazo y no cambian: se cargan una vez
+        promoted = {}
+        for position in positions:
+            triplet = body[position]
+            if position in moved or triplet.operador == Opcode.CALL:
+                continue
+            for operand in triplet.uses():
+                if isinstance(operand, (StackSlot, GlobalSlot)) and invariant_slot(operand) and operand not in promoted:
+                    promoted[operand] = Temporal(next_temp)
+                    next_temp += 1
+
+        if len(moved) == 0 and len(promoted) == 0:
+            return None
+        self.hoisted += len(moved)
+        self.promoted += len(promoted)
+
+        def use(operand):
+            return promoted.get(operand, operand)
+
+        preheader = [Tripleta(Opcode.MOVE, slot, destino=temp) for slot, temp in promoted.items()]
+        for position in moved:
+            temp = renamed.get(position)
+            preheader.append(body[position].map_operands(use, lambda operand: operand if temp is None else temp))
+
+        in_loop = set(positions)
+        result = []
+        for position, triplet in enumerate(body):
+            if position == insert_at:
+                result.extend(preheader)
+            if position in renamed:
+                result.append(Tripleta(Opcode.MOVE, renamed[position], destino=triplet.destino))
+            elif position in in_loop and position not in moved:
+                if triplet.operador != Opcode.CALL:
+                    triplet = triplet.map_operands(use, lambda operand: operand)
+                result.append(triplet)
+            elif position not in in_loop:
+                result.append(triplet)
+        if insert_at == len(body):
+            result.extend(preheader)
+        return result
@@ -0,0 +1,228 @@
+from modules.Temporal import Temporal
+
+
+class StackSlot():
+    # Variable local de la funcion: sp[index]
+    __slots__ = ('index', 'tipo')
+
+    def __init__(self, index, tipo = None) -> None:
+        self.index = index
+        self.tipo = tipo
+
+    def __str__(self):
+        return f"sp[{self.index}]"
+
+    def __eq__(self, other):
+        return isinstance(other, StackSlot) and other.index == self.index
+
+    def __hash__(self):
+        return hash(('sp', self.index))
+
+
+class GlobalSlot():
+    # Atributo del objeto actual: sp_GLOBAL[index]
+    __slots__ = ('index', 'tipo')
+
+    def __init__(self, index, tipo = None) -> None:
+        self.index = index
+        self.tipo = tipo
+
+    def __str__(self):
+        return f"sp_GLOBAL[{self.index}]"
+
+    def __eq__(self, other):
+        return isinstance(other, GlobalSlot) and other.index == self.index
+
+    def __hash__(self):
+        return hash(('sp_GLOBAL', self.index))
+
+
+class Constant():
+    # Literal Int, Bool o String; value guarda el valor ya interpretado
+    __slots__ = ('value',)
+
+    def __init__(self, value) -> None:
+        self.value = value
+
+    @staticmethod
+    def from_literal(text):
+        if text == "true" or text == "false":
+            return Constant(text == "true")
+        if text.startswith('"'):
+            value = text[1:-1]
+            value = value.replace("\\n", "\n")
+            value = value.replace("\\t", "\t")
+            return Constant(value)
+        return Constant(int(text))
+
+    def is_string(self):
+        return isinstance(self.value, str)
+
+    def immediate(self):
+        # Valor para un li de MIPS
+        return int(self.value)
+
+    def __str__(self):
+        if isinstance(self.value, bool):
+            return "true" if self.value else "false"
+        if isinstance(self.value, str):
+            value = self.value.replace("\n", "\\n")
+            value = value.replace("\t", "\\t")
+            return f'"{value}"'
+        return str(self.value)
+
+    def __eq__(self, other):
+        return isinstance(other, Constant) and type(other.value) == type(self.value) and other.value == self.value
+
+    def __hash__(self):
+        return hash(('const', type(self.value).__name__, self.value))
+
+
+class Label():
+    __slots__ = ('name',)
+
+    def __init__(self, name) -> None:
+        self.name = name
+
+    def __str__(self):
+        return self.name
+
+    def __eq__(self, other):
+        return isinstance(other, Label) and other.name == self.name
+
+    def __hash__(self):
+        return hash(('label', self.name))
+
+
+class NewObject():
+    # Instancia nueva de una clase: NEW Tipo
+    __slots__ = ('tipo',)
+
+    def __init__(self, tipo) -> None:
+        self.tipo = tipo
+
+    def __str__(self):
+        return f"NEW {self.tipo}"
+
+
+class SelfRef():
+    __slots__ = ()
+
+    def __str__(self):
+        return "self"
+
+
+class ParamRef():
+    # Parametro recibido por la funcion: Tipo.PARAM_index
+    __slots__ = ('tipo', 'index')
+
+    def __init__(self, tipo, index) -> None:
+        self.tipo = tipo
+        self.index = index
+
+    def __str__(self):
+        return f"{self.tipo}.PARAM_{self.index}"
+
+
+class Register():
+    # Registro de MIPS asignado por el RegisterAllocator (t0..t5, s0, s4, s5)
+    __slots__ = ('name',)
+
+    def __init__(self, name) -> None:
+        self.name = name
+
+    def __str__(self):
+        return self.name
+
+    def __eq__(self, other):
+        return isinstance(other, Register) and other.name == self.name
+
+    def __hash__(self):
+        return hash(('reg', self.name))
+
+
+# Metodos de IO/String que AssemblerConvertor resuelve con rutinas propias
+RESERVED = ('out_int', 'out_string', 'in_int', 'in_string', 'concat', 'substr', 'length')
+# Metodos de Object; si el programa no los redefine no estan en ninguna tabla virtual
+OBJECT_METHODS = ('abort', 'type_name', 'copy')
+
+
+class MethodRef():
+    # Destino de un CALL. receiver es un operando (objeto) o el nombre de la clase
+    # cuando la llamada es sobre self; at_type es el tipo de un dispatch estatico (@Tipo)
+    # y static_type el tipo estatico del receptor que se conocia al generar el 3D
+    __slots__ = ('receiver', 'method', 'at_type', 'static_type')
+
+    def __init__(self, receiver, method, at_type = None, static_type = None) -> None:
+        self.receiver = receiver
+        self.method = method
+        self.at_type = at_type
+        self.static_type = static_type
+
+    def is_self_call(self):
+        return isinstance(self.receiver, str)
+
+    def receiver_type(self):
+        # Tipo estatico del objeto sobre el que se llama (None si no se sabe)
+        if self.is_self_call():
+            return self.receiver
+        if isinstance(self.receiver, NewObject):
+            return self.receiver.tipo
+        if self.static_type is not None:
+            return self.static_type
+        return getattr(self.receiver, "tipo", None)
+
+    def is_reserved(self):
+        return self.method in RESERVED
+
+    def __str__(self):
+        if self.at_type is not None:
+            return f"{self.receiver}.{self.at_type}.{self.method}"
+        return f"{self.receiver}.{self.method}"
+
+
+def int_constant(operand):
+    # Valor de una constante Int (None si no es una)
+    if isinstance(operand, Constant) and isinstance(operand.value, int) and not isinstance(operand.value, bool):
+        return operand.value
+    return None
+
+
+def parse_operand(text):
+    # Convierte el texto de un operando del 3D a su objeto
+    text = text.strip()
+    if text == "self":
+        return SelfRef()
+    if text.startswith("NEW "):
+        return NewObject(text.split(" ")[1])
+    if text.startswith("sp_GLOBAL["):
+        return GlobalSlot(int(text[len("sp_GLOBAL["):-1]))
+    if text.startswith("sp["):
+        return StackSlot(int(text[len("sp["):-1]))
+    if text.startswith("LABEL_"):
+        return Label(text)
+    if ".PARAM_" in text:
+        tipo, index = text.split(".PARAM_")
+        return ParamRef(tipo, int(index))
+    if len(text) > 1 and text[0] == "t" and text[1:].isdigit():
+        return Temporal(int(text[1:]))
+    if len(text) > 1 and text[0] == "s" and text[1:].isdigit():
+        return Register(text)
+    return Constant.from_literal(text)
+
+
+def split_at_type(text):
+    # Tipo.method | method -> (at_type, method)
+    if "." in text:
+        at_type, method = text.split(".", 1)
+        return at_type, method
+    return None, text
+
+
+def parse_method(text):
+    # receiver.method | receiver.Tipo.method | Clase.method
+    receiver, rest = text.split(".", 1)
+    at_type, rest = split_at_type(rest)
+    if receiver[0].isupper():
+        return MethodRef(receiver, rest, at_type)
+    return MethodRef(parse_operand(receiver), rest, at_type)
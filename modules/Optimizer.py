@@ -0,0 +1,82 @@
+from modules.ControlFlowGraph import split_functions
+from modules.Operand import StackSlot, GlobalSlot
+from modules.Inliner import Inliner
+from modules.TailCallElimination import TailCallElimination
+from modules.ConstantFolding import ConstantFolding
+from modules.ValueNumbering import ValueNumbering
+from modules.CopyPropagation import CopyPropagation
+from modules.LoopInvariantCodeMotion import LoopInvariantCodeMotion
+from modules.StrengthReduction import StrengthReduction
+from modules.DeadCodeElimination import DeadCodeElimination
+from modules.BranchSimplification import BranchSimplification
+from modules.TreeShaking import TreeShaking
+
+
+def memory_accesses(body):
+    # Lecturas y escrituras de sp[k] / sp_GLOBAL[k] (cada una es un lw o sw)
+    count = 0
+    for triplet in body:
+        for operand in triplet.uses() + [triplet.defines()]:
+            if isinstance(operand, (StackSlot, GlobalSlot)):
+                count += 1
+    return count
+
+
+class Optimizer():
+    # Corre los pases de optimizacion sobre cada FUNCTION del 3D.
+    # level 0 no cambia nada; 1 y 2 corren los pases en el orden de passes()
+    def __init__(self, code, level = 1) -> None:
+        self.code = code
+        self.level = level
+        # funcion -> {"antes": tripletas, "despues": tripletas,
+        #            "memoria": (accesos a sp antes, accesos a sp despues)}
+        self.report = {}
+        # funcion -> metodos que el Inliner metio en ella
+        self.inlined = {}
+        # clases y funciones que no se alcanzan desde Main.main
+        self.removed = []
+
+    def passes(self):
+        if self.level <= 0:
+            return []
+        # Las copias que dejan ValueNumbering, LoopInvariantCodeMotion y
+        # StrengthReduction se propagan y despues se dobla lo que quedo con
+        # constantes. Los saltos se arreglan al final
+        return [TailCallElimination(self.code), ConstantFolding(), ValueNumbering(), CopyPropagation(), LoopInvariantCodeMotion(),
+                StrengthReduction(), CopyPropagation(), ConstantFolding(), DeadCodeElimination(),
+                BranchSimplification()]
+
+    def optimize(self):
+        # Regresa una lista nueva de tripletas; lo de fuera de las funciones queda igual
+        passes = self.passes()
+        code = self.code
+        if self.level > 0:
+            # Antes que los pases de cada funcion: el cuerpo que se mete tambien se optimiza
+            inliner = Inliner(code)
+            code = inliner.inline()
+            self.inlined = inliner.report
+        result = []
+        previous = 0
+        for start, end in split_functions(code):
+            result.extend(code[previous:start])
+            body = code[start + 1:end]
+            before = len(body)
+            accesses = memory_accesses(body)
+            name = code[start].direccion1
+            for optimization in passes:
+                # Los pases que necesitan saber que funcion es (Clase.metodo)
+                if hasattr(optimization, "function"):
+                    optimization.function = name
+                body = optimization.run(body)
+            self.report[name] = {"antes": before, "despues": len(body), "memoria": (accesses, memory_accesses(body))}
+            result.append(code[start])
+            result.extend(body)
+            result.append(code[end])
+            previous = end + 1
+        result.extend(code[previous:])
+        if self.level > 0:
+            # Despues de meter los metodos chicos quedan funciones que nadie llama
+            shaker = TreeShaking(result)
+            result = shaker.shake()
+            self.removed = shaker.removed
+        return result
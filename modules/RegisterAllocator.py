@@ -0,0 +1,148 @@
+from modules.Tripleta import Tripleta, Opcode
+from modules.Temporal import Temporal
+from modules.Operand import Register, StackSlot, NewObject
+from modules.Liveness import Liveness
+from modules.ControlFlowGraph import split_functions
+
+
+class RegisterAllocator():
+    # $t0-$t5 los guarda el que llama (solo los vivos despues del CALL); $s0, $s4
+    # y $s5 los guarda la funcion que los usa, por eso los temporales que cruzan
+    # una llamada van primero a $s. $t6-$t8 quedan para el AssemblerConvertor
+    # ($t6 recibe el resultado de un temporal que se guarda en el stack)
+    CALLER_SAVED = ["t0", "t1", "t2", "t3", "t4", "t5"]
+    REGISTERS = CALLER_SAVED + ["s0", "s4", "s5"]
+    SPILL = Temporal(6)
+
+    def __init__(self, code, registers = None) -> None:
+        self.code = code
+        self.registers = registers if registers is not None else self.REGISTERS
+        # funcion -> {"temporales", "registros", "spills", "moves"}
+        self.report = {}
+
+    def allocate(self):
+        # Regresa una lista nueva de tripletas; las de fuera de una funcion
+        # (inicializacion de atributos) se dejan igual
+        result = []
+        previous = 0
+        for start, end in split_functions(self.code):
+            result.extend(self.code[previous:start])
+            result.extend(self.allocate_function(self.code[start], self.code[start + 1:end]))
+            result.append(self.code[end])
+            previous = end + 1
+        result.extend(self.code[previous:])
+        return result
+
+    def allocate_function(self, function, body):
+        liveness = Liveness(body)
+        # El constructor de un NEW usa $t0-$t8 sin guardarlos (en un CALL NEW se
+        # guardan con los de la llamada)
+        clobbers = [position for position, triplet in enumerate(body)
+                    if triplet.operador != Opcode.CALL and any(isinstance(operand, NewObject) for operand in triplet.uses())]
+        calls = [position for position, triplet in enumerate(body)
+                 if triplet.operador == Opcode.CALL and not triplet.direccion1.is_reserved()]
+        temporals = liveness.intervals()
+        assignment, spilled = self.assign(liveness, clobbers, calls)
+
+        # Los temporales que no caben se guardan despues de las variables locales
+        size = function.size if function.size is not None else 0
+        slots = {}
+        for temp in spilled:
+            slots[temp] = StackSlot(size)
+            size += 4
+
+        saved = sorted({name for name in assignment.values() if name.startswith("s")})
+        saves = {}
+        for name in saved:
+            saves[name] = StackSlot(size)
+            size += 4
+
+        def use(operand):
+            if isinstance(operand, Temporal):
+                if operand in slots:
+                    return slots[operand]
+                return Register(assignment[operand])
+            return operand
+
+        def define(operand):
+            if isinstance(operand, Temporal):
+                if operand in slots:
+                    return self.SPILL
+                return Register(assignment[operand])
+            return operand
+
+        code = [Tripleta(Opcode.FUNCTION, function.direccion1, size=size if size > 0 else function.size)]
+        for name in saved:
+            code.append(Tripleta(Opcode.ASSIGN, Register(name), destino=saves[name]))
+
+        moves = 0
+        for triplet in body:
+            written = triplet.defines()
+            triplet = triplet.map_operands(use, define)
+            # tX = tY que quedaron en el mismo registro no generan move
+            if triplet.operador == Opcode.MOVE and isinstance(triplet.direccion1, Register) and triplet.direccion1 == triplet.destino:
+                moves += 1
+                continue
+            code.append(triplet)
+            if isinstance(written, Temporal) and written in slots:
+                code.append(Tripleta(Opcode.ASSIGN, self.SPILL, destino=slots[written]))
+
+        for name in saved:
+            code.append(Tripleta(Opcode.MOVE, saves[name], destino=Register(name)))
+
+        self.report[function.direccion1] = {
+            "temporales": len(temporals),
+            "registros": len(set(assignment.values())),
+            "spills": len(spilled),
+            "moves": moves,
+        }
+        return code
+
+    def assign(self, liveness, clobbers, calls = ()):
+        # temporal -> nombre del registro, y la lista de los que van al stack
+        return self.linear_scan(liveness.intervals(), clobbers, calls)
+
+    def linear_scan(self, intervals, clobbers = (), calls = ()):
+        # Poletto & Sarkar: se recorren los intervalos por inicio; si no hay registro
+        # libre se manda al stack el que termina mas tarde.
+        # Los que siguen vivos despues de un NEW solo pueden ir en $s, y los que
+        # siguen vivos despues de un CALL prefieren $s (se guardan una vez por funcion)
+        order = sorted(intervals, key=lambda temp: (intervals[temp][0], temp.number))
+        free = list(self.registers)
+        active = []
+        assignment = {}
+        spilled = []
+        for temp in order:
+            start, end = intervals[temp]
+
+            # Liberar los que ya terminaron (se lee antes de escribir en la misma tripleta)
+            for other in list(active):
+                if intervals[other][1] <= start:
+                    active.remove(other)
+                    free.insert(0, assignment[other])
+            free.sort(key=self.registers.index)
+
+            candidates = free
+            if any(start < position < end for position in clobbers):
+                candidates = [name for name in free if name.startswith("s")]
+                if len(candidates) == 0:
+                    spilled.append(temp)
+                    continue
+            elif any(start < position < end for position in calls):
+                candidates = sorted(free, key=lambda name: not name.startswith("s"))
+
+            if len(candidates) > 0:
+                assignment[temp] = candidates[0]
+                free.remove(candidates[0])
+                active.append(temp)
+                continue
+
+            victim = max(active, key=lambda other: intervals[other][1])
+            if intervals[victim][1] > end:
+                assignment[temp] = assignment.pop(victim)
+                active.remove(victim)
+                active.append(temp)
+                spilled.append(victim)
+            else:
+                spilled.append(temp)
+        return assignment, spilled
@@ -0,0 +1,116 @@
+from modules.Tripleta import Tripleta, Opcode, next_temp_number
+from modules.Temporal import Temporal
+from modules.Operand import StackSlot, Constant, NewObject, int_constant
+from modules.ControlFlowGraph import ControlFlowGraph
+from modules.ConstantFolding import to32
+
+
+class StrengthReduction():
+    # Reduccion de fuerza de las variables de induccion. En un lazo donde sp[k]
+    # solo cambia con t = PLUS sp[k] c / ASSIGN sp[k] t, cada MULT sp[k] m se
+    # cambia por un temporal que vale sp[k] * m: se calcula en el preheader y se
+    # le suma c * m junto al incremento. Las multiplicaciones y divisiones entre
+    # constantes las resuelve AssemblerConvertor con corrimientos
+    def __init__(self) -> None:
+        self.reduced = 0
+
+    def run(self, body):
+        changed = True
+        while changed:
+            changed = False
+            cfg = ControlFlowGraph(body)
+            for loop in sorted(cfg.loops, key=lambda loop: -loop.depth):
+                new_body = self.reduce(body, cfg, loop)
+                if new_body is not None:
+                    body = new_body
+                    changed = True
+                    break
+        return body
+
+    def induction_variables(self, body, cfg, loop):
+        # sp[k] -> (posicion del ASSIGN que la incrementa, paso)
+        definitions = {}
+        for number in loop.body:
+            for triplet in cfg.blocks[number].triplets:
+                written = triplet.defines()
+                if written is not None:
+                    definitions[written] = definitions.get(written, 0) + 1
+                if triplet.operador == Opcode.ASSIGN and isinstance(triplet.direccion1, NewObject):
+                    return {}
+
+        variables = {}
+        for number in loop.body:
+            block = cfg.blocks[number]
+            for position in range(block.start + 1, block.end):
+                triplet = body[position]
+                variable = triplet.destino
+                if triplet.operador != Opcode.ASSIGN or not isinstance(variable, StackSlot):
+                    continue
+                if definitions[variable] != 1:
+                    continue
+                increment = body[position - 1]
+                if increment.destino != triplet.direccion1 or not isinstance(triplet.direccion1, Temporal):
+                    continue
+                step = None
+                if increment.operador == Opcode.PLUS and increment.direccion1 == variable:
+                    step = int_constant(increment.direccion2)
+                elif increment.operador == Opcode.PLUS and increment.direccion2 == variable:
+                    step = int_constant(increment.direccion1)
+                elif increment.operador == Opcode.MINUS and increment.direccion1 == variable:
+                    step = int_constant(increment.direccion2)
+                    step = -step if step is not None else None
+                if step is not None:
+                    variables[variable] = (position, step)
+        return variables
+
+    def reduce(self, body, cfg, loop):
+        insert_at = cfg.preheader(loop)
+        if insert_at is None:
+            return None
+        variables = self.induction_variables(body, cfg, loop)
+        if len(variables) == 0:
+            return None
+
+        # (sp[k], m) -> temporal que lleva sp[k] * m
+        reduced = {}
+        replaced = {}
+        next_temp = next_temp_number(body)
+        for number in loop.body:
+            block = cfg.blocks[number]
+            for position in range(block.start, block.end):
+                triplet = body[position]
+                if triplet.operador != Opcode.MULT:
+                    continue
+                for variable, factor in ((triplet.direccion1, triplet.direccion2), (triplet.direccion2, triplet.direccion1)):
+                    factor = int_constant(factor)
+                    if variable in variables and factor is not None:
+                        key = (variable, factor)
+                        if key not in reduced:
+                            reduced[key] = Temporal(next_temp)
+                            next_temp += 1
+                        replaced[position] = reduced[key]
+                        break
+
+        if len(replaced) == 0:
+            return None
+        self.reduced += len(replaced)
+
+        preheader = [Tripleta(Opcode.MULT, variable, Constant(factor), destino=temp)
+                     for (variable, factor), temp in reduced.items()]
+        updates = {}
+        for (variable, factor), temp in reduced.items():
+            position, step = variables[variable]
+            updates.setdefault(position, []).append(
+                Tripleta(Opcode.PLUS, temp, Constant(to32(step * factor)), destino=temp))
+
+        result = []
+        for position, triplet in enumerate(body):
+            if position == insert_at:
+                result.extend(preheader)
+            if position in replaced:
+                triplet = Tripleta(Opcode.MOVE, replaced[position], destino=triplet.destino)
+            result.append(triplet)
+            result.extend(updates.get(position, []))
+        if insert_at == len(body):
+            result.extend(preheader)
+        return result
@@ -0,0 +1,176 @@
+from modules.Tripleta import Tripleta, Opcode, next_temp_number
+from modules.Temporal import Temporal
+from modules.Operand import StackSlot, Constant, Label
+from modules.ClassHierarchy import ClassHierarchy
+
+# Operaciones con las que se puede llevar un acumulador: f(n) = x OP f(n - 1)
+ACCUMULATE = {Opcode.PLUS: 0, Opcode.MULT: 1}
+
+
+class TailCallElimination():
+    # Una llamada a la misma funcion sobre self cuyo resultado es lo que se
+    # regresa se cambia por guardar los argumentos en los sp[k] de los
+    # parametros y saltar al inicio del cuerpo (mismo frame, sin CALL).
+    # Si el resultado se combina una vez con PLUS/MULT antes de regresarlo
+    # (n * factorial(n - 1)) se lleva un acumulador y todos los RETURN regresan
+    # acumulador OP valor. No se hace si una subclase redefine el metodo
+    def __init__(self, code) -> None:
+        self.hierarchy = ClassHierarchy(code)
+        # Nombre de la funcion que se optimiza (Clase.metodo), lo pone Optimizer
+        self.function = None
+        self.eliminated = 0
+
+    def run(self, body):
+        if self.function is None:
+            return body
+        class_name, method = self.function.split(".", 1)
+        # Si una subclase redefine el metodo la llamada sobre self puede ir a otro
+        if self.hierarchy.is_overridden(class_name, method):
+            return body
+
+        positions = {}
+        for index, triplet in enumerate(body):
+            if triplet.operador == Opcode.LABEL:
+                positions[triplet.direccion1] = index
+
+        # Parametro i -> sp[k] donde se guarda
+        params = {}
+        start = 0
+        while start < len(body) and body[start].operador == Opcode.LOAD_PARAM:
+            params[body[start].direccion1.index] = body[start].destino
+            start += 1
+
+        sites = []
+        for index, triplet in enumerate(body):
+            if not self.is_recursive_call(triplet, class_name, method):
+                continue
+            count = triplet.direccion2
+            if index < count or any(body[index - 1 - i].operador != Opcode.PARAM for i in range(count)):
+                continue
+            accumulation = self.tail_position(body, positions, index)
+            if accumulation is not None:
+                sites.append((index, count, accumulation))
+        if len(sites) == 0:
+            return body
+
+        # Todos los sitios con acumulador tienen que usar la misma operacion
+        operations = {accumulation[0] for index, count, accumulation in sites if accumulation[0] is not None}
+        if len(operations) > 1:
+            sites = [site for site in sites if site[2][0] is None]
+            operations = set()
+            if len(sites) == 0:
+                return body
+        self.eliminated += len(sites)
+
+        next_temp = next_temp_number(body)
+        label = Label(f"LABEL_{self.function.replace('.', '_')}_TAIL")
+        accumulator = None
+        if len(operations) == 1:
+            operation = operations.pop()
+            accumulator = Temporal(next_temp)
+            next_temp += 1
+
+        replacements = {}
+        for index, count, (op, other) in sites:
+            # Los argumentos se copian primero a temporales: pueden leer los
+            # sp[k] de los parametros que se van a escribir
+            jump = []
+            values = []
+            for i in range(count):
+                value = body[index - count + i].direccion1
+                if not isinstance(value, Constant):
+                    temp = Temporal(next_temp)
+                    next_temp += 1
+                    jump.append(Tripleta(Opcode.MOVE, value, destino=temp))
+                    value = temp
+                values.append(value)
+            if op is not None:
+                jump.append(Tripleta(op, accumulator, other, destino=accumulator))
+            for i, value in enumerate(values):
+                if i in params:
+                    jump.append(Tripleta(Opcode.ASSIGN, value, destino=params[i]))
+            jump.append(Tripleta(Opcode.GOTO, label))
+            replacements[index - count] = (index, jump)
+
+        result = list(body[:start])
+        if accumulator is not None:
+            result.append(Tripleta(Opcode.MOVE, Constant(ACCUMULATE[operation]), destino=accumulator))
+        result.append(Tripleta(Opcode.LABEL, label))
+        index = start
+        while index < len(body):
+            if index in replacements:
+                end, jump = replacements[index]
+                result.extend(jump)
+                index = end + 1
+                continue
+            triplet = body[index]
+            if accumulator is not None and triplet.operador == Opcode.RETURN:
+                value = Temporal(next_temp)
+                next_temp += 1
+                result.append(Tripleta(operation, accumulator, triplet.direccion1, destino=value))
+                triplet = Tripleta(Opcode.RETURN, value)
+            result.append(triplet)
+            index += 1
+        return result
+
+    def is_recursive_call(self, triplet, class_name, method):
+        if triplet.operador != Opcode.CALL:
+            return False
+        target = triplet.direccion1
+        return (target.is_self_call() and target.receiver == class_name and target.method == method
+                and target.at_type is None)
+
+    def tail_position(self, body, positions, index):
+        # Sigue el camino desde la llamada hasta el final del cuerpo. Regresa
+        # (None, None) si el resultado se regresa tal cual, (OP, x) si antes se
+        # combina una vez con x, o None si no esta en posicion de cola
+        holders = {body[index].destino}
+        written_after = set()
+        accumulation = (None, None)
+        returned = False
+        visited = set()
+        position = index + 1
+        while position < len(body):
+            if position in visited:
+                return None
+            visited.add(position)
+            triplet = body[position]
+            op = triplet.operador
+            written = triplet.defines()
+            if op == Opcode.LABEL:
+                pass
+            elif op == Opcode.GOTO:
+                position = positions[triplet.direccion1]
+                continue
+            elif op == Opcode.MOVE or (op == Opcode.ASSIGN and isinstance(written, StackSlot)):
+                # Copias dentro del frame, que se descarta
+                if triplet.direccion1 in holders:
+                    holders.add(written)
+                else:
+                    holders.discard(written)
+            elif op in ACCUMULATE and accumulation[0] is None and isinstance(written, Temporal):
+                operands = [triplet.direccion1, triplet.direccion2]
+                if operands[0] in holders and operands[1] not in holders:
+                    other = operands[1]
+                elif operands[1] in holders and operands[0] not in holders:
+                    other = operands[0]
+                else:
+                    return None
+                # El otro operando se lee en el lugar de la llamada: no puede ser
+                # algo que la llamada cambie (sp_GLOBAL) ni que se escriba despues
+                if not isinstance(other, (Temporal, StackSlot, Constant)) or other in written_after:
+                    return None
+                if isinstance(other, Constant) and other.is_string():
+                    return None
+                accumulation = (op, other)
+                holders = {written}
+            elif op == Opcode.RETURN:
+                if triplet.direccion1 not in holders:
+                    return None
+                returned = True
+            else:
+                return None
+            if written is not None:
+                written_after.add(written)
+            position += 1
+        return accumulation if returned else None
@@ -0,0 +1,46 @@
+class TempAllocator():
+    # Numeros de temporales/registros vivos guardados como bits de un entero:
+    # el bit n encendido indica que tN esta en uso.
+    # allocate devuelve el numero libre mas bajo y allocate_last el mas alto (< limit)
+    __slots__ = ('live', 'count', 'high_water', 'limit')
+
+    def __init__(self, limit = None) -> None:
+        self.live = 0
+        self.count = 0
+        # Maximo de temporales vivos al mismo tiempo
+        self.high_water = 0
+        self.limit = limit
+
+    def allocate(self):
+        # Bit libre mas bajo: el primer 0 de live
+        numero = (~self.live & (self.live + 1)).bit_length() - 1
+        if self.limit is not None and numero >= self.limit:
+            raise RuntimeError(f"No hay temporales libres (limite {self.limit})")
+        return self.take(numero)
+
+    def allocate_last(self):
+        # Bit libre mas alto por debajo del limite
+        free = ~self.live & ((1 << self.limit) - 1)
+        if free == 0:
+            raise RuntimeError(f"No hay temporales libres (limite {self.limit})")
+        return self.take(free.bit_length() - 1)
+
+    def take(self, numero):
+        self.live |= 1 << numero
+        self.count += 1
+        if self.count > self.high_water:
+            self.high_water = self.count
+        return numero
+
+    def release(self, numero):
+        if self.live >> numero & 1:
+            self.live &= ~(1 << numero)
+            self.count -= 1
+
+    def is_live(self, numero):
+        return self.live >> numero & 1 == 1
+
+    def reset(self):
+        # Libera todo (fin de funcion); high_water se conserva
+        self.live = 0
+        self.count = 0
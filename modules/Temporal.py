@@ -1,6 +1,15 @@
 class Temporal():
-    def __init__(self,number,datos) -> None:
+    __slots__ = ('number', 'datos')
+
+    def __init__(self,number,datos = None) -> None:
         self.number = number
         self.datos = datos
-    
-    
\ No newline at end of file
+
+    def __str__(self):
+        return f"t{self.number}"
+
+    def __eq__(self, other):
+        return isinstance(other, Temporal) and other.number == self.number
+
+    def __hash__(self):
+        return hash(('t', self.number))
@@ -2,8 +2,10 @@ from antlr4 import *
 from antlr4 import ParseTreeVisitor
 from modules.Symbol import Symbol, SymboTable
 from modules.Type import TypeSystem
-from modules.Tripleta import Tripleta
+from modules.Tripleta import Tripleta, Opcode, format_code
 from modules.Temporal import Temporal
+from modules.TempAllocator import TempAllocator
+from modules.Operand import StackSlot, GlobalSlot, Constant, Label, NewObject, SelfRef, ParamRef, MethodRef
 from yapl.YAPLParser import YAPLParser 
 
 
@@ -15,18 +17,32 @@ class TreeDirections(ParseTreeVisitor):
         self.type_system = TypeSystem()
         self.triplets = []
         self.temporals = []
+        self.temp_allocator = TempAllocator()
         self.labels = []
         self.sp = "_GLOBAL"
+        self.current_class = ""
+        # clase -> [tripletas de los atributos], para copiar los del padre en la
+        # clase hija. Los metodos heredados salen de la tabla virtual que arma
+        # AssemblerConvertor con los FUNCTION del 3D
+        self.class_attributes = {}
         self.output = output
         self.clean()
 
     def clean(self):
-        with open(self.output, 'w') as file:
-            pass
+        self.triplets = []
+
+    def write(self,triplet: Tripleta):
+        # Se guarda en memoria para no abrir el archivo en cada tripleta
+        self.triplets.append(triplet)
 
-    def write(self,triplet):
-        with open(self.output, 'a') as file:
-            file.write(str(triplet) + '\n')
+    def getCode(self):
+        return format_code(self.triplets)
+
+    def dump(self, output = None):
+        # Escribe todo el codigo de 3 direcciones de una sola vez
+        path = output if output is not None else self.output
+        with open(path, 'w') as file:
+            file.write(self.getCode())
 
     def visit(self, tree):
         if isinstance(tree, YAPLParser.ProgramContext):
@@ -71,19 +87,56 @@ class TreeDirections(ParseTreeVisitor):
         or symbol_type == YAPLParser.STRING:
             temp = Temporal(self.getNextTemp(), obj)
             self.temporals.append(temp)
-            self.write(f"\tt{temp.number} = {temp.datos}")
+            self.write(Tripleta(Opcode.MOVE, Constant.from_literal(obj), destino=temp))
             return temp
         else:
             # Buscar su tipo en la tabla de símbolos
             symbol = self.symbol_table.lookup(ctx.getText())
             if symbol is not None and symbol.isvar:
-                res = f"sp{self.sp}[{symbol.memory_position}]"
-                ##self.write(f"\t{symbol.name} t{temp.number} = {temp.datos}")
-                ##self.temporals.append(temp)
-                return res
+                return self.slot(self.sp, symbol)
             else:
                 return None
+
+    def slot(self, sp, symbol):
+        # sp_GLOBAL son los atributos del objeto, sp las variables de la funcion
+        if sp == "_GLOBAL":
+            return GlobalSlot(symbol.memory_position, symbol.type)
+        return StackSlot(symbol.memory_position, symbol.type)
             
+    def static_type(self, operand):
+        # Tipo estatico del receptor de una llamada (None si no se sabe); con el
+        # se escoge el indice en la tabla virtual
+        if isinstance(operand, (GlobalSlot, StackSlot, NewObject)):
+            return operand.tipo
+        if isinstance(operand, Constant):
+            return "String" if operand.is_string() else "Bool" if isinstance(operand.value, bool) else "Int"
+        if isinstance(operand, Temporal):
+            if operand.datos == "self":
+                return self.current_class
+            if isinstance(operand.datos, Tripleta) and operand.datos.operador == Opcode.CALL:
+                method = operand.datos.direccion1
+                class_name = method.at_type or method.receiver_type()
+                return self.return_type(class_name, method.method)
+            if isinstance(operand.datos, Tripleta) and operand.datos.operador in (Opcode.LE, Opcode.LT, Opcode.EQ, Opcode.NOT, Opcode.ISVOID):
+                return "Bool"
+            if isinstance(operand.datos, Tripleta) and operand.datos.operador in (Opcode.PLUS, Opcode.MINUS, Opcode.MULT, Opcode.DIV, Opcode.NEG):
+                return "Int"
+        return None
+
+    def return_type(self, class_name, method):
+        # Tipo que regresa class_name.method; el scope de la clase tambien tiene
+        # los metodos heredados. SELF_TYPE es el tipo del receptor
+        symbol = self.symbol_table.lookup(class_name) if class_name is not None else None
+        if symbol is None or symbol.myscope is None:
+            return None
+        for scope in symbol.myscope.children:
+            if scope.name == class_name:
+                found = scope.lookup(method)
+                if found is None:
+                    return None
+                return class_name if found.type == "SELF_TYPE" else found.type
+        return None
+
     def visitProgram(self, ctx: YAPLParser.ProgramContext):
         for child in ctx.children:
             self.visit(child)
@@ -94,47 +147,19 @@ class TreeDirections(ParseTreeVisitor):
         inherits_from = None  # Inicializamos la variable
         obj = ctx.getText()
 
-        trip = f"CLASS {class_name}"
-        tripletas_inherits_funcs = {}
+        trip = Tripleta(Opcode.CLASS, class_name)
+        self.current_class = class_name
         tripletas_inherits_vars = []
-        funcct_started = ''
+        self.class_attributes[class_name] = []
         if ctx.INHERITS():  # Si hay herencia
             # Obtenemos el tipo padre
-            #tripletas_inherits = []
             inherits_from = ctx.TYPE_ID()[1].getText()
-            trip += f" INHERITS ['{inherits_from}']"
-            # leer el documento de tripletas
-            file_txt = ""
-            with open(self.output, 'r') as file:
-                file_txt = file.read()
-            
-            banderin = False
-            # Buscar las tripletas de la clase padre
-            for line in file_txt.split('\n'):
-                if line.startswith(f"CLASS {inherits_from}"):
-                    #tripletas_inherits.append(line)
-                    banderin = True
-                elif banderin:
-                    if line.startswith("END CLASS"):
-                        banderin = False
-                    else:
-                        if line.startswith("FUNCTION"):
-                            func_name = line.split(".")[1]
-                            funcct_started = func_name
-                            tripletas_inherits_funcs[funcct_started] = []
-                            tripletas_inherits_funcs[funcct_started].append(f"FUNCTION {class_name}.{func_name}")
-                        elif line.startswith("END FUNCTION"):
-                            func_name = line.split(".")[1]
-                            tripletas_inherits_funcs[funcct_started].append(f"END FUNCTION {class_name}.{func_name}")
-                            funcct_started = ''
-                        else:
-                            if funcct_started != '':
-                                tripletas_inherits_funcs[funcct_started].append(line)
-                            else:
-                                tripletas_inherits_vars.append(line)
+            trip.direccion2 = inherits_from
+            # Tripletas de la clase padre (las clases se generan en orden)
+            tripletas_inherits_vars = [line.copy() for line in self.class_attributes.get(inherits_from, [])]
 
         symbol = self.symbol_table.lookup(class_name)
-        trip += f" SIZE {symbol.memory_usage}"
+        trip.size = symbol.memory_usage
         class_scope = self.symbol_table.current_scope
         for scope in symbol.myscope.children:
             if scope.name == class_name:
@@ -149,32 +174,13 @@ class TreeDirections(ParseTreeVisitor):
             # Agregar las tripletas de la clase padre
             for triplet in tripletas_inherits_vars:
                 self.write(triplet)
+            self.class_attributes[class_name].extend(tripletas_inherits_vars)
         
         for child in ctx.children:
             self.visit(child)
         self.symbol_table.current_scope = self.symbol_table.current_scope.parent
-        
-        if len(tripletas_inherits_funcs) > 0:
-            # Agregar las tripletas de la clase padre
-            for func in tripletas_inherits_funcs:
-
-                with open(self.output, 'r') as file:
-                    file_txt = file.read()
-                
-                banderin = False
-                formated_T = f"FUNCTION {class_name}.{func}"
 
-                for line in file_txt.split('\n'):
-                    if line.startswith(formated_T):
-                        banderin = True
-
-                if banderin == False:
-
-                    for triplet in tripletas_inherits_funcs[func]:
-                        self.write(triplet)
-
-        trip2 = f"END CLASS {class_name}\n"
-        self.write(trip2)
+        self.write(Tripleta(Opcode.END_CLASS, class_name))
         return None
     
     def visitFeatureDef(self, ctx: YAPLParser.FeatureDefContext):
@@ -185,7 +191,7 @@ class TreeDirections(ParseTreeVisitor):
             self.sp = ""
             simbol: Symbol = self.symbol_table.lookup(name)
             function_scope = self.symbol_table.current_scope
-            self.write(f"\nFUNCTION {simbol.scope} SIZE {simbol.memory_usage}")
+            self.write(Tripleta(Opcode.FUNCTION, simbol.scope, size=simbol.memory_usage))
 
             for scope in simbol.myscope.children:
                 if scope.name == name:
@@ -203,8 +209,7 @@ class TreeDirections(ParseTreeVisitor):
 
                 sim: Symbol = self.symbol_table.lookup(name)
                 
-                smm = f"sp[{sim.memory_position}] = {sim.type}.PARAM_{idx}"
-                self.write(f"\t{smm}")
+                self.write(Tripleta(Opcode.LOAD_PARAM, ParamRef(sim.type, idx), destino=StackSlot(sim.memory_position, sim.type)))
 
             children = []
             for child in ctx.children:
@@ -212,30 +217,26 @@ class TreeDirections(ParseTreeVisitor):
                 if chil is not None:
                     children.append(chil)
             
-            retunr_srt = self.dobleinstance(children[-1],"")
-
-            self.write(f"\tRETURN {retunr_srt}\n")
-            self.write(f"END FUNCTION {simbol.scope}\n")
+            self.write(Tripleta(Opcode.RETURN, children[-1]))
+            self.write(Tripleta(Opcode.END_FUNCTION, simbol.scope))
             self.temporals = []
+            self.temp_allocator.reset()
 
             self.symbol_table.current_scope = self.symbol_table.current_scope.parent
             self.sp = "_GLOBAL"
 
         else:
             if ctx.ASSIGN():
+                attribute_start = len(self.triplets)
                 visitexpr = self.visit(ctx.children[-1])
                 name = ctx.OBJECT_ID().getText()
                 simbol: Symbol = self.symbol_table.lookup(name)
                 if isinstance(visitexpr, Temporal):
-                    temp = self.temporals.pop()
-                    triplet = f"ASSIGN sp{self.sp}[{simbol.memory_position}] t{visitexpr.number}"
-                else:
-                    triplet = f"ASSIGN sp{self.sp}[{simbol.memory_position}] {visitexpr}"
-                # temp = Temporal(self.getNextTemp(), triplet)
-                # tempis = f"\t{triplet}"
-                # self.temporals.append(temp)
-                self.write(f"\t{triplet}")
-                return f"sp{self.sp}[{simbol.memory_position}]"
+                    temp = self.popTemp()
+                dest = self.slot(self.sp, simbol)
+                self.write(Tripleta(Opcode.ASSIGN, visitexpr, destino=dest))
+                self.class_attributes[self.current_class].extend(self.triplets[attribute_start:])
+                return dest
 
             else:
                 return
@@ -243,38 +244,15 @@ class TreeDirections(ParseTreeVisitor):
         return None
     
     def getNextTemp(self):
-        numbers_of_temps = []
-        for temp in self.temporals:
-            numbers_of_temps.append(temp.number)
-        
-        conjunto = set(numbers_of_temps)
-
-        # Empezamos buscando desde el 0 en adelante
-        numero = 0
-        while True:
-            if numero not in conjunto:
-                return numero
-            numero += 1
+        # El numero mas bajo que no este vivo
+        return self.temp_allocator.allocate()
 
+    def popTemp(self):
+        temp = self.temporals.pop()
+        self.temp_allocator.release(temp.number)
+        return temp
 
     
-    def dobleinstance(self,izq,der):
-
-        if isinstance(izq, Temporal) and isinstance(der, Temporal):
-            #tizq = self.temporals.pop()
-            #tder = self.temporals.pop()
-            triplet = f"t{izq.number} t{der.number}"
-        elif isinstance(izq, Temporal) and isinstance(der, str):
-            #tizq = self.temporals.pop()
-            triplet = f"t{izq.number} {der}"
-        elif isinstance(izq, str) and isinstance(der, Temporal):
-            #tder = self.temporals.pop()
-            triplet = f"{izq} t{der.number}"
-        else:
-            triplet = f"{izq} {der}"
-        
-        return triplet
-    
     def visitFormalDef(self, ctx: YAPLParser.FormalDefContext):
         return None
     
@@ -297,41 +275,33 @@ class TreeDirections(ParseTreeVisitor):
 
             funcChild = params.pop(0)
             visitFunc = self.visit(children[funcChild["expr"]])
-            #funcTemp = self.temporals.pop()
+            #funcTemp = self.popTemp()
             
             tempsParams = []
             for param in params:
                 visit = self.visit(children[param["expr"]])
                 tempsParams.append(visit)
-                #paramsTemp = self.temporals.pop()
+                #paramsTemp = self.popTemp()
             
             for index, param in enumerate(tempsParams):
-                param_str = self.dobleinstance(param,"")
-                sms = f"\tPARAM {param_str}"
-                self.write(sms)
+                self.write(Tripleta(Opcode.PARAM, param))
 
-            isAtt = "."
+            nameatt = None
             if ctx.AT():
                 nameatt = ctx.TYPE_ID()[0].getText()
-                isAtt = f".{nameatt}."
-
-            if isinstance(visitFunc,Temporal):
-                func_str = f"t{visitFunc.number}"
-            else:
-                func_str = visitFunc
-            #funcTemp = self.temporals.pop()
 
-            triplet = f"CALL {func_str}{isAtt}{ctx.OBJECT_ID()[0].getText()} {len(tempsParams)}"
-            sms = f"\tt{self.getNextTemp()} = {triplet}"
-            self.write(sms)
-            temporal = Temporal(self.getNextTemp(), sms)
+            method = MethodRef(visitFunc, ctx.OBJECT_ID()[0].getText(), nameatt, self.static_type(visitFunc))
+            temporal = Temporal(self.getNextTemp())
+            triplet = Tripleta(Opcode.CALL, method, len(tempsParams), destino=temporal)
+            temporal.datos = triplet
+            self.write(triplet)
 
             for param in tempsParams:
                 if isinstance(param, Temporal):
-                    paramTemp = self.temporals.pop()
+                    paramTemp = self.popTemp()
             
             if isinstance(visitFunc,Temporal):
-                funcTemp = self.temporals.pop()
+                funcTemp = self.popTemp()
 
             self.temporals.append(temporal)
             return temporal
@@ -351,25 +321,28 @@ class TreeDirections(ParseTreeVisitor):
             for param in params:
                 visit = self.visit(children[param["expr"]])
                 tempsParams.append(visit)
-                #paramsTemp = self.temporals.pop()
+                #paramsTemp = self.popTemp()
             
             for index, param in enumerate(tempsParams):
-                pram_str = self.dobleinstance(param,"")
-                sms = f"\tPARAM {pram_str}"
-                self.write(sms)
+                self.write(Tripleta(Opcode.PARAM, param))
 
 
             func_str = ctx.OBJECT_ID()[0].getText()
             sim = self.symbol_table.lookup(func_str)
-            
-            triplet = f"CALL {sim.scope} {len(tempsParams)}"
-            sms = f"\tt{self.getNextTemp()} = {triplet}"
-            self.write(sms)
-            temporal = Temporal(self.getNextTemp(), sms)
+
+            # Los metodos heredados no tienen scope, se llaman sobre la clase actual
+            class_name = self.current_class
+            if sim.scope is not None:
+                class_name = sim.scope.split(".")[0]
+
+            temporal = Temporal(self.getNextTemp())
+            triplet = Tripleta(Opcode.CALL, MethodRef(class_name, func_str), len(tempsParams), destino=temporal)
+            temporal.datos = triplet
+            self.write(triplet)
 
             for param in tempsParams:
                 if isinstance(param, Temporal):
-                    paramTemp = self.temporals.pop()
+                    paramTemp = self.popTemp()
             self.temporals.append(temporal)
             return temporal
 
@@ -380,10 +353,7 @@ class TreeDirections(ParseTreeVisitor):
             
             
             if isinstance(condition, Temporal):
-                conditionTemp = self.temporals.pop()
-                condition_str = f"t{condition.number}"
-            else:
-                condition_str = condition
+                conditionTemp = self.popTemp()
 
             trulabel = f"LABEL_L{len(self.labels)}"
             self.labels.append(trulabel)
@@ -395,72 +365,55 @@ class TreeDirections(ParseTreeVisitor):
             temporal = Temporal(self.getNextTemp(), "TEMPIF")
             self.temporals.append(temporal)
 
-            self.write(f"\tIF {condition_str} GOTO {trulabel}")
-            self.write(f"\tGOTO {falselabel}")
-            self.write(f"{trulabel}:")
+            self.write(Tripleta(Opcode.IF, condition, Label(trulabel)))
+            self.write(Tripleta(Opcode.GOTO, Label(falselabel)))
+            self.write(Tripleta(Opcode.LABEL, Label(trulabel)))
             trueVisit = self.visit(ctx.children[3])
 
-            if isinstance(trueVisit, Temporal):
-                triplet = f"t{temporal.number} = t{trueVisit.number}"
-            else:
-                triplet = f"t{temporal.number} = {trueVisit}"
+            self.write(Tripleta(Opcode.MOVE, trueVisit, destino=temporal))
 
-            sms = f"\t{triplet}"
-            self.write(sms)
 
-
-            self.write(f"\tGOTO {endIfLabel}")
-            self.write(f"{falselabel}:")
+            self.write(Tripleta(Opcode.GOTO, Label(endIfLabel)))
+            self.write(Tripleta(Opcode.LABEL, Label(falselabel)))
             falseVisit = self.visit(ctx.children[5])
 
             if isinstance(falseVisit, Temporal):
                 if len(self.temporals) > 0:
                     
-                    falseVisitTe = self.temporals.pop()
-                triplet = f"t{temporal.number} = t{falseVisit.number}"
-            else:
-                triplet = f"t{temporal.number} = {falseVisit}"
+                    falseVisitTe = self.popTemp()
             if isinstance(trueVisit, Temporal):
                 if len(self.temporals) > 0:
-                    trueVisitTe = self.temporals.pop()
+                    trueVisitTe = self.popTemp()
                     
-            sms = f"\t{triplet}"
-            self.write(sms)
-            self.write(f"{endIfLabel}:")
+            self.write(Tripleta(Opcode.MOVE, falseVisit, destino=temporal))
+            self.write(Tripleta(Opcode.LABEL, Label(endIfLabel)))
 
-            #TempIF = self.temporals.pop()
+            #TempIF = self.popTemp()
 
             return temporal
 
         #WHILE expr LOOP expr POOL
         elif ctx.WHILE():
-            condition = ctx.children[1]
-            condition= self.visit(condition)
-
-            if isinstance(condition, Temporal):
-                conditionTemp = self.temporals.pop()
-                condition_str = f"t{condition.number}"
-            else:
-                condition_str = condition
-
+            # Lazo rotado: se salta a la condicion, que queda al final del cuerpo.
+            # Cada vuelta es un solo salto condicional hacia atras
             labelstart = f"LABEL_L{len(self.labels)}"
             self.labels.append(labelstart)
-            labelend = f"LABEL_L{len(self.labels)}"
-            self.labels.append(labelend)
-
             looplabel = f"LABEL_L{len(self.labels)}"
             self.labels.append(looplabel)
 
-            self.write(f"{labelstart}:")
-            self.write(f"\tIF {condition_str} GOTO {looplabel}")
-            self.write(f"\tGOTO {labelend}")
-            self.write(f"{looplabel}:")
+            self.write(Tripleta(Opcode.GOTO, Label(labelstart)))
+            self.write(Tripleta(Opcode.LABEL, Label(looplabel)))
             trueVisit = self.visit(ctx.children[3])
-            self.write(f"\tGOTO {labelstart}")
-            self.write(f"{labelend}:")
 
-            if isinstance(trueVisit, Temporal):
-                triplet = f"t{temporal.number} = t{trueVisit.number}"
+            # La condicion se calcula en cada vuelta (despues de la etiqueta)
+            self.write(Tripleta(Opcode.LABEL, Label(labelstart)))
+            condition = ctx.children[1]
+            condition= self.visit(condition)
+
+            if isinstance(condition, Temporal):
+                conditionTemp = self.popTemp()
+
+            self.write(Tripleta(Opcode.IF, condition, Label(looplabel)))
 
             temporal = Temporal(self.getNextTemp(), "Object")
             self.temporals.append(temporal)
@@ -484,8 +437,8 @@ class TreeDirections(ParseTreeVisitor):
                 visit = self.visit(children[expr["expr"]])
                 if isinstance(visit, Temporal):
                     if len(self.temporals) > 0:
-                        visitTemp = self.temporals.pop()
-                    #visitedTemp = self.temporals.pop()
+                        visitTemp = self.popTemp()
+                    #visitedTemp = self.popTemp()
                 cisitedExprs.append(visit)
 
             return cisitedExprs[-1]
@@ -515,53 +468,38 @@ class TreeDirections(ParseTreeVisitor):
                         sp = "_GLOBAL"
                     else:
                         sp = self.sp
-                smm = f"sp{sp}[{symbol.memory_position}]"
+                smm = self.slot(sp, symbol)
 
                 visitexpr = self.visit(children[asignacion["expr"]])
 
-                asign_str = self.dobleinstance(smm,visitexpr)
-
                 if isinstance(visitexpr, Temporal):
-                    #visitexpr = self.temporals.pop()
-                    asing_Temp = self.temporals.pop()
-
-                ##triplet = f"ASSIGN t{ visitname.number} t{visitexpr.number}"
-                sms = f"ASSIGN {asign_str}"
-                #temporal = Temporal(self.getNextTemp(), sms)
-                ##sms = f"\tt{temporal.number} = {triplet}"
-                self.write(f"\t{sms}")
+                    #visitexpr = self.popTemp()
+                    asing_Temp = self.popTemp()
+
+                self.write(Tripleta(Opcode.ASSIGN, visitexpr, destino=smm))
                 #self.temporals.append(temporal)
 
             vistLastExp = self.visit(children[lasExpresion["expr"]]) 
             if isinstance(vistLastExp, Temporal):
-                #lastTemp = self.temporals.pop()
+                #lastTemp = self.popTemp()
                 if len(self.temporals) > 0:
-                    lastTemp = self.temporals.pop()
-                #vistLastExp = self.temporals.pop()
+                    lastTemp = self.popTemp()
+                #vistLastExp = self.popTemp()
             return vistLastExp
 
         elif ctx.NEW():
-            triplet = f"NEW {ctx.TYPE_ID()[0].getText()}"
-            return triplet
-            sms = f"\tt{self.getNextTemp()} = {triplet}"
-            self.write(sms)
-            temporal = Temporal(self.getNextTemp(), sms)
-            self.temporals.append(temporal)
-            return temporal
+            return NewObject(ctx.TYPE_ID()[0].getText())
 
 
         elif ctx.NOT():
             expr = ctx.children[1]
             visit = self.visit(expr)
 
-            neg_str = self.dobleinstance(visit,"")
-            triplet = f"NOT {neg_str}"
             if isinstance(visit, Temporal):
-                visitTemp = self.temporals.pop()
-            sms = f"\tt{self.getNextTemp()} = {triplet}"
-            self.write(sms)
-            
-            temporal = Temporal(self.getNextTemp(), sms)
+                visitTemp = self.popTemp()
+            temporal = Temporal(self.getNextTemp())
+            temporal.datos = Tripleta(Opcode.NOT, visit, destino=temporal)
+            self.write(temporal.datos)
             self.temporals.append(temporal)
             return temporal
         
@@ -569,14 +507,11 @@ class TreeDirections(ParseTreeVisitor):
             expr = ctx.children[1]
             visit = self.visit(expr)
 
-            neg_str = self.dobleinstance(visit,"")
-
-            triplet = f"NEG {neg_str}"
             if isinstance(visit, Temporal):
-                visitTemp = self.temporals.pop()
-            sms = f"\tt{self.getNextTemp()} = {triplet}"
-            self.write(sms)
-            temporal = Temporal(self.getNextTemp(), sms)
+                visitTemp = self.popTemp()
+            temporal = Temporal(self.getNextTemp())
+            temporal.datos = Tripleta(Opcode.NEG, visit, destino=temporal)
+            self.write(temporal.datos)
             self.temporals.append(temporal)
             return temporal
         
@@ -584,157 +519,34 @@ class TreeDirections(ParseTreeVisitor):
             expr = ctx.children[1]
             visit = self.visit(expr)
 
-            neg_str = self.dobleinstance(visit,"")
-
-            triplet = f"ISVOID {neg_str}"
-            self.write(sms)
             if isinstance(visit, Temporal):
-                visitTemp = self.temporals.pop()
-            sms = f"\tt{self.getNextTemp()} = {triplet}"
-            temporal = Temporal(self.getNextTemp(), sms)
+                visitTemp = self.popTemp()
+            temporal = Temporal(self.getNextTemp())
+            temporal.datos = Tripleta(Opcode.ISVOID, visit, destino=temporal)
+            self.write(temporal.datos)
             self.temporals.append(temporal)
             return temporal
 
         elif ctx.PLUS():
-            left = ctx.children[0]
-            right = ctx.children[2]
-            children = []
-            visitLeft = self.visit(left)
-            visitRight = self.visit(right)
-            asing = self.dobleinstance(visitLeft,visitRight)
-
-            triplet = f"PLUS {asing}"
-            if isinstance(visitLeft, Temporal):
-                visitTemp = self.temporals.pop()
-            if isinstance(visitRight, Temporal):
-                visitTemp = self.temporals.pop()
-            temporal = Temporal(self.getNextTemp(), triplet)
-            sms = f"\tt{temporal.number} = {triplet}"
-            self.write(sms)
-
-            self.temporals.append(temporal)
-            return temporal
+            return self.binary(ctx, Opcode.PLUS)
 
         elif ctx.MINUS():
-            left = ctx.children[0]
-            right = ctx.children[2]
-            children = []
-            visitLeft = self.visit(left)
-            visitRight = self.visit(right)
-
-            asing = self.dobleinstance(visitLeft,visitRight)
-
-            triplet = f"MINUS {asing}"
-            if isinstance(visitLeft, Temporal):
-                visitTemp = self.temporals.pop()
-            if isinstance(visitRight, Temporal):
-                visitTemp = self.temporals.pop()
-            temporal = Temporal(self.getNextTemp(), triplet)
-            sms = f"\tt{temporal.number} = {triplet}"
-            self.write(sms)
-
-            self.temporals.append(temporal)
-            return temporal
+            return self.binary(ctx, Opcode.MINUS)
         
         elif ctx.MULT():
-            left = ctx.children[0]
-            right = ctx.children[2]
-            children = []
-            visitLeft = self.visit(left)
-            visitRight = self.visit(right)
-            asing = self.dobleinstance(visitLeft,visitRight)
-
-            triplet = f"MULT {asing}"
-            if isinstance(visitLeft, Temporal):
-                visitTemp = self.temporals.pop()
-            if isinstance(visitRight, Temporal):
-                visitTemp = self.temporals.pop()
-            temporal = Temporal(self.getNextTemp(), triplet)
-            sms = f"\tt{temporal.number} = MULT {asing}"
-            self.write(sms)
-
-            self.temporals.append(temporal)
-            return temporal
+            return self.binary(ctx, Opcode.MULT)
         
         elif ctx.DIV():
-            left = ctx.children[0]
-            right = ctx.children[2]
-            children = []
-            visitLeft = self.visit(left)
-            visitRight = self.visit(right)
-            asing = self.dobleinstance(visitLeft,visitRight)
-
-            triplet = f"DIV {asing}"
-            if isinstance(visitLeft, Temporal):
-                visitTemp = self.temporals.pop()
-            if isinstance(visitRight, Temporal):
-                visitTemp = self.temporals.pop()
-            temporal = Temporal(self.getNextTemp(), triplet)
-            sms = f"\tt{temporal.number} = DIV {asing}"
-            self.write(sms)
-
-            self.temporals.append(temporal)
-            return temporal
+            return self.binary(ctx, Opcode.DIV)
 
         elif ctx.LE():
-            left = ctx.children[0]
-            right = ctx.children[2]
-
-            visitLeft = self.visit(left)
-            visitRight = self.visit(right)
-            asing = self.dobleinstance(visitLeft,visitRight)
-
-            triplet = f"LE {asing}"
-            if isinstance(visitLeft, Temporal):
-                visitTemp = self.temporals.pop()
-            if isinstance(visitRight, Temporal):
-                visitTemp = self.temporals.pop()
-            temporal = Temporal(self.getNextTemp(), triplet)
-            sms = f"\tt{temporal.number} = LE {asing}"
-            self.write(sms)
-
-            self.temporals.append(temporal)
-            return temporal
+            return self.binary(ctx, Opcode.LE)
         
         elif ctx.LT():
-            left = ctx.children[0]
-            right = ctx.children[2]
-
-            visitLeft = self.visit(left)
-            visitRight = self.visit(right)
-            asing = self.dobleinstance(visitLeft,visitRight)
-
-            triplet = f"LT {asing}"
-            if isinstance(visitLeft, Temporal):
-                visitTemp = self.temporals.pop()
-            if isinstance(visitRight, Temporal):
-                visitTemp = self.temporals.pop()
-            temporal = Temporal(self.getNextTemp(), triplet)
-            sms = f"\tt{temporal.number} = LT {asing}"
-            self.write(sms)
-
-            self.temporals.append(temporal)
-            return temporal
+            return self.binary(ctx, Opcode.LT)
         
         elif ctx.EQ():
-            left = ctx.children[0]
-            right = ctx.children[2]
-
-            visitLeft = self.visit(left)
-            visitRight = self.visit(right)
-            asing = self.dobleinstance(visitLeft,visitRight)
-
-            triplet = f"EQ {asing}"
-            if isinstance(visitLeft, Temporal):
-                visitTemp = self.temporals.pop()
-            if isinstance(visitRight, Temporal):
-                visitTemp = self.temporals.pop()
-            temporal = Temporal(self.getNextTemp(), triplet)
-            self.temporals.append(temporal)
-            sms = f"\tt{temporal.number} = {triplet}"
-            self.write(sms)
-            
-            return temporal
+            return self.binary(ctx, Opcode.EQ)
 
 
         
@@ -749,21 +561,13 @@ class TreeDirections(ParseTreeVisitor):
                 sp = "_GLOBAL"
             else:
                 sp = self.sp
-            smm = f"sp{sp}[{symbol.memory_position}]"
+            smm = self.slot(sp, symbol)
             right = ctx.children[2]
-            children = []
 
             visitRight = self.visit(right)
             if isinstance(visitRight, Temporal):
-                visitTemp = self.temporals.pop()
-                triplet = f"ASSIGN {smm} t{visitRight.number}"
-            else:
-                triplet = f"ASSIGN {smm} {visitRight}"
-            ## triplet = f"ASSIGN t{visitLeft.number} t{visitRight.number}"
-            #triplet = f"{smm} = t{visitRight.number}"
-            #temporal = Temporal(self.getNextTemp(), triplet)
-            sms = f"\t{triplet}"
-            self.write(sms)
+                visitTemp = self.popTemp()
+            self.write(Tripleta(Opcode.ASSIGN, visitRight, destino=smm))
             return smm
 
 
@@ -773,46 +577,16 @@ class TreeDirections(ParseTreeVisitor):
 
 
         elif ctx.FALSE():
-            return "false"
-            temporal = Temporal(self.getNextTemp(), "false")
-            self.temporals.append(temporal)
-
-            triplet = f"t{temporal.number} = false"
-            sms = f"\tt{temporal.number} = false"
-            self.write(sms)
-            return temporal
+            return Constant(False)
     
         elif ctx.TRUE():
-            return "true"
-            temporal = Temporal(self.getNextTemp(), "true")
-            self.temporals.append(temporal)
-
-            triplet = f"t{temporal.number} = true"
-            sms = f"\tt{temporal.number} = true"
-            self.write(sms)
-            return temporal
+            return Constant(True)
         
         elif ctx.INT():
-            number = ctx.INT().getText()
-            return number
-            temporal = Temporal(self.getNextTemp(), number)
-            self.temporals.append(temporal)
-
-            triplet = f"t{temporal.number} = {number}"
-            sms = f"\tt{temporal.number} = {number}"
-            self.write(sms)
-            return temporal
+            return Constant(int(ctx.INT().getText()))
         
         elif ctx.STRING():
-            string = ctx.STRING().getText()
-            return string
-            temporal = Temporal(self.getNextTemp(), string)
-            self.temporals.append(temporal)
-
-            triplet = f"t{temporal.number} = {string}"
-            sms = f"\tt{temporal.number} = {string}"
-            self.write(sms)
-            return temporal
+            return Constant.from_literal(ctx.STRING().getText())
         
         elif ctx.OBJECT_ID():
             name = ctx.OBJECT_ID()[0].getText()
@@ -820,10 +594,7 @@ class TreeDirections(ParseTreeVisitor):
             if name == "self":
                 temporal = Temporal(self.getNextTemp(), "self")
                 self.temporals.append(temporal)
-
-                triplet = f"t{temporal.number} = self"
-                sms = f"\tt{temporal.number} = self"
-                self.write(sms)
+                self.write(Tripleta(Opcode.MOVE, SelfRef(), destino=temporal))
                 return temporal
 
             symbol = self.symbol_table.lookup(name)
@@ -834,11 +605,26 @@ class TreeDirections(ParseTreeVisitor):
                 sp = "_GLOBAL"
             else:
                 sp = self.sp
-            smm = f"sp{sp}[{symbol.memory_position}]"
-            return smm
+            return self.slot(sp, symbol)
             
         
 
 
         return None
 
+    def binary(self, ctx: YAPLParser.ExprContext, operador: Opcode):
+        left = ctx.children[0]
+        right = ctx.children[2]
+        visitLeft = self.visit(left)
+        visitRight = self.visit(right)
+
+        if isinstance(visitLeft, Temporal):
+            visitTemp = self.popTemp()
+        if isinstance(visitRight, Temporal):
+            visitTemp = self.popTemp()
+        temporal = Temporal(self.getNextTemp())
+        temporal.datos = Tripleta(operador, visitLeft, visitRight, destino=temporal)
+        self.write(temporal.datos)
+
+        self.temporals.append(temporal)
+        return temporal
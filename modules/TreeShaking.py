@@ -0,0 +1,128 @@
+from modules.Tripleta import Opcode
+from modules.Operand import NewObject
+from modules.ControlFlowGraph import split_functions
+from modules.ClassHierarchy import ClassHierarchy
+
+
+class TreeShaking():
+    # Quita las clases y metodos a los que no se llega desde Main.main. Se
+    # siguen los CALL de las funciones alcanzadas y los NEW (tambien los de los
+    # inicializadores de atributos); una llamada virtual puede ir a la version
+    # del metodo de cualquier clase instanciada abajo del tipo estatico.
+    # Se quedan los padres de las clases instanciadas y las definiciones que
+    # redefine un metodo alcanzado, para no mover los indices de la tabla virtual
+    def __init__(self, code) -> None:
+        self.code = code
+        self.hierarchy = ClassHierarchy(code)
+        self.functions = {}     # Clase.metodo -> cuerpo
+        for start, end in split_functions(code):
+            self.functions[code[start].direccion1] = code[start + 1:end]
+        # clase -> tripletas del constructor (lo que esta fuera de las funciones)
+        self.constructors = {}
+        current = None
+        inside = False
+        for triplet in code:
+            op = triplet.operador
+            if op == Opcode.CLASS:
+                current = triplet.direccion1
+                self.constructors[current] = []
+            elif op == Opcode.FUNCTION:
+                inside = True
+            elif op == Opcode.END_FUNCTION:
+                inside = False
+            elif op != Opcode.END_CLASS and current is not None and not inside:
+                self.constructors[current].append(triplet)
+        self.removed = []       # clases y funciones que se quitaron
+
+    def reachable(self):
+        # (clases instanciadas, funciones alcanzadas) desde Main.main
+        instantiated = set()
+        functions = set()
+        pending_classes = ["Main"]
+        pending_functions = ["Main.main"]
+        calls = []
+        while len(pending_functions) > 0:
+            while len(pending_classes) > 0 or len(pending_functions) > 0:
+                if len(pending_classes) > 0:
+                    name = pending_classes.pop()
+                    if name in instantiated or name not in self.constructors:
+                        continue
+                    instantiated.add(name)
+                    body = self.constructors[name]
+                else:
+                    name = pending_functions.pop()
+                    if name in functions or name not in self.functions:
+                        continue
+                    functions.add(name)
+                    body = self.functions[name]
+                for triplet in body:
+                    # ASSIGN x NEW Tipo y CALL (NEW Tipo).metodo
+                    for operand in triplet.uses():
+                        if isinstance(operand, NewObject):
+                            pending_classes.append(operand.tipo)
+                    if triplet.operador == Opcode.CALL and not triplet.direccion1.is_reserved():
+                        calls.append(triplet.direccion1)
+            # Una clase nueva puede agregar destinos a las llamadas ya vistas
+            for method in calls:
+                pending_functions.extend(target for target in self.targets(method, instantiated)
+                                         if target not in functions)
+        return instantiated, functions
+
+    def targets(self, method, instantiated):
+        # Funciones a las que puede ir la llamada con las clases instanciadas
+        if method.at_type is not None:
+            return self.defined(method.at_type, method.method)
+        if isinstance(method.receiver, NewObject):
+            return self.defined(method.receiver.tipo, method.method)
+        static = method.receiver_type()
+        if static not in self.hierarchy.parents:
+            # Sin tipo conocido: cualquier clase que defina el metodo
+            return [name for name in self.functions if name.split(".", 1)[1] == method.method]
+        found = []
+        for class_name in self.hierarchy.descendants(static):
+            if class_name in instantiated:
+                found.extend(self.defined(class_name, method.method))
+        return found
+
+    def defined(self, class_name, method):
+        defined = self.hierarchy.resolve(class_name, method)
+        return [] if defined is None else [f"{defined}.{method}"]
+
+    def shake(self):
+        # Regresa el codigo sin lo que no se alcanza
+        instantiated, functions = self.reachable()
+        classes = set()
+        for class_name in instantiated:
+            while class_name is not None and class_name not in classes:
+                classes.add(class_name)
+                class_name = self.hierarchy.parents.get(class_name)
+
+        kept = set(functions)
+        for name in functions:
+            class_name, method = name.split(".", 1)
+            parent = self.hierarchy.parents.get(class_name)
+            defined = self.hierarchy.resolve(parent, method)
+            while defined is not None:
+                kept.add(f"{defined}.{method}")
+                defined = self.hierarchy.resolve(self.hierarchy.parents.get(defined), method)
+
+        result = []
+        skip_class = False
+        skip_function = False
+        for triplet in self.code:
+            op = triplet.operador
+            if op == Opcode.CLASS:
+                skip_class = triplet.direccion1 not in classes
+                if skip_class:
+                    self.removed.append(triplet.direccion1)
+            elif op == Opcode.FUNCTION and not skip_class:
+                skip_function = triplet.direccion1 not in kept
+                if skip_function:
+                    self.removed.append(triplet.direccion1)
+            if not skip_class and not skip_function:
+                result.append(triplet)
+            if op == Opcode.END_FUNCTION:
+                skip_function = False
+            elif op == Opcode.END_CLASS:
+                skip_class = False
+        return result
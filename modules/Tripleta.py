@@ -1,6 +1,224 @@
+import re
+from enum import Enum
+from modules.Operand import Label, MethodRef, NewObject, parse_operand, parse_method, split_at_type
+from modules.Temporal import Temporal
+
+
+class Opcode(Enum):
+    CLASS = "CLASS"
+    END_CLASS = "END CLASS"
+    FUNCTION = "FUNCTION"
+    END_FUNCTION = "END FUNCTION"
+    LOAD_PARAM = "LOAD_PARAM"   # sp[k] = Tipo.PARAM_i
+    MOVE = "MOVE"               # t = x
+    PLUS = "PLUS"
+    MINUS = "MINUS"
+    MULT = "MULT"
+    DIV = "DIV"
+    LE = "LE"
+    LT = "LT"
+    EQ = "EQ"
+    NOT = "NOT"
+    NEG = "NEG"
+    ISVOID = "ISVOID"
+    CALL = "CALL"
+    PARAM = "PARAM"
+    ASSIGN = "ASSIGN"
+    RETURN = "RETURN"
+    IF = "IF"
+    IFNOT = "IFNOT"             # salta si la condicion es falsa
+    GOTO = "GOTO"
+    LABEL = "LABEL"
+
+
+BINARY_OPS = (Opcode.PLUS, Opcode.MINUS, Opcode.MULT, Opcode.DIV, Opcode.LE, Opcode.LT, Opcode.EQ)
+UNARY_OPS = (Opcode.NOT, Opcode.NEG, Opcode.ISVOID)
+# Instrucciones que leen solo direccion1 / que escriben en destino
+READS_DIRECCION1 = (Opcode.MOVE, Opcode.PARAM, Opcode.ASSIGN, Opcode.RETURN, Opcode.IF, Opcode.IFNOT)
+WRITES_DESTINO = (Opcode.MOVE, Opcode.CALL, Opcode.LOAD_PARAM, Opcode.ASSIGN)
+# Saltos condicionales: IF c GOTO L / IFNOT c GOTO L
+BRANCHES = (Opcode.IF, Opcode.IFNOT)
+
+
 class Tripleta():
+    # destino: temporal o slot que recibe el resultado
+    # direccion1, direccion2: operandos (ver modules/Operand.py)
+    # size: bytes reservados para CLASS y FUNCTION
+    __slots__ = ('operador', 'direccion1', 'direccion2', 'destino', 'size')
 
-    def __init__(self,operador,direccion1 , direccion2 = None) -> None:
+    def __init__(self,operador,direccion1 , direccion2 = None, destino = None, size = None) -> None:
         self.operador = operador
         self.direccion1 = direccion1
-        self.direccion2 = direccion2
\ No newline at end of file
+        self.direccion2 = direccion2
+        self.destino = destino
+        self.size = size
+
+    def copy(self):
+        return Tripleta(self.operador, self.direccion1, self.direccion2, self.destino, self.size)
+
+    def uses(self):
+        # Operandos que lee la instruccion
+        op = self.operador
+        if op in BINARY_OPS:
+            return [self.direccion1, self.direccion2]
+        if op in UNARY_OPS or op in READS_DIRECCION1:
+            return [self.direccion1]
+        if op == Opcode.CALL and not self.direccion1.is_self_call():
+            return [self.direccion1.receiver]
+        return []
+
+    def defines(self):
+        # Operando que escribe la instruccion (None si no escribe)
+        if self.operador in BINARY_OPS or self.operador in UNARY_OPS or self.operador in WRITES_DESTINO:
+            return self.destino
+        return None
+
+    def map_operands(self, use, define):
+        # Copia de la tripleta con los operandos leidos pasados por use
+        # y el escrito pasado por define
+        triplet = self.copy()
+        op = self.operador
+        if op in BINARY_OPS:
+            triplet.direccion1 = use(self.direccion1)
+            triplet.direccion2 = use(self.direccion2)
+        elif op in UNARY_OPS or op in READS_DIRECCION1:
+            triplet.direccion1 = use(self.direccion1)
+        elif op == Opcode.CALL and not self.direccion1.is_self_call():
+            method = self.direccion1
+            triplet.direccion1 = MethodRef(use(method.receiver), method.method, method.at_type, method.static_type)
+        if triplet.defines() is not None:
+            triplet.destino = define(self.destino)
+        return triplet
+
+    def __str__(self):
+        op = self.operador
+        if op == Opcode.CLASS:
+            trip = f"CLASS {self.direccion1}"
+            if self.direccion2 is not None:
+                trip += f" INHERITS ['{self.direccion2}']"
+            if self.size is not None:
+                trip += f" SIZE {self.size}"
+            return trip
+        if op == Opcode.FUNCTION:
+            if self.size is not None:
+                return f"FUNCTION {self.direccion1} SIZE {self.size}"
+            return f"FUNCTION {self.direccion1}"
+        if op in (Opcode.END_CLASS, Opcode.END_FUNCTION):
+            return f"{op.value} {self.direccion1}"
+        if op == Opcode.LABEL:
+            return f"{self.direccion1}:"
+        if op == Opcode.LOAD_PARAM or op == Opcode.MOVE:
+            return f"{self.destino} = {self.direccion1}"
+        if op in BINARY_OPS:
+            return f"{self.destino} = {op.value} {self.direccion1} {self.direccion2}"
+        if op in UNARY_OPS:
+            return f"{self.destino} = {op.value} {self.direccion1}"
+        if op == Opcode.CALL:
+            return f"{self.destino} = CALL {self.direccion1} {self.direccion2}"
+        if op == Opcode.ASSIGN:
+            return f"ASSIGN {self.destino} {self.direccion1}"
+        if op in BRANCHES:
+            return f"{op.value} {self.direccion1} GOTO {self.direccion2}"
+        return f"{op.value} {self.direccion1}"
+
+    def __repr__(self):
+        return f"<Tripleta {self}>"
+
+
+def format_code(code):
+    # Texto del 3D con la misma forma que se escribia en output/3D
+    lines = []
+    for triplet in code:
+        op = triplet.operador
+        if op == Opcode.FUNCTION:
+            lines.append("")
+            lines.append(str(triplet))
+        elif op in (Opcode.END_FUNCTION, Opcode.END_CLASS):
+            lines.append(str(triplet))
+            lines.append("")
+        elif op in (Opcode.CLASS, Opcode.LABEL):
+            lines.append(str(triplet))
+        else:
+            lines.append(f"\t{triplet}")
+    return '\n'.join(lines) + '\n'
+
+
+def next_temp_number(code):
+    # Numero para un temporal nuevo que no choque con los que ya usa el codigo
+    numbers = [-1]
+    for triplet in code:
+        for operand in triplet.uses() + [triplet.defines()]:
+            if isinstance(operand, Temporal):
+                numbers.append(operand.number)
+    return max(numbers) + 1
+
+
+_TOKEN = re.compile(r'"(?:\\.|[^"\\])*"|\S+')
+
+
+def parse_line(line):
+    # Convierte una linea del 3D en texto a su Tripleta (None si esta vacia)
+    line = line.strip()
+    if line == "":
+        return None
+    tokens = line.split(" ")
+    if line.startswith("CLASS"):
+        parent = None
+        size = None
+        if "INHERITS" in tokens:
+            parent = tokens[tokens.index("INHERITS") + 1].strip("[']")
+        if "SIZE" in tokens:
+            size = int(tokens[tokens.index("SIZE") + 1])
+        return Tripleta(Opcode.CLASS, tokens[1], parent, size=size)
+    if line.startswith("END CLASS"):
+        return Tripleta(Opcode.END_CLASS, tokens[2])
+    if line.startswith("END FUNCTION"):
+        return Tripleta(Opcode.END_FUNCTION, tokens[2])
+    if line.startswith("FUNCTION"):
+        size = int(tokens[3]) if len(tokens) > 3 else None
+        return Tripleta(Opcode.FUNCTION, tokens[1], size=size)
+    if line.endswith(":"):
+        return Tripleta(Opcode.LABEL, Label(line[:-1]))
+    if tokens[0] == "GOTO":
+        return Tripleta(Opcode.GOTO, Label(tokens[1]))
+    if tokens[0] == "IF" or tokens[0] == "IFNOT":
+        return Tripleta(Opcode(tokens[0]), parse_operand(tokens[1]), Label(tokens[3]))
+    if tokens[0] == "PARAM":
+        return Tripleta(Opcode.PARAM, parse_operand(line[len("PARAM "):]))
+    if tokens[0] == "RETURN":
+        return Tripleta(Opcode.RETURN, parse_operand(line[len("RETURN "):]))
+    if tokens[0] == "ASSIGN":
+        rest = line[len("ASSIGN "):]
+        dest, value = rest.split(" ", 1)
+        return Tripleta(Opcode.ASSIGN, parse_operand(value), destino=parse_operand(dest))
+
+    dest, rhs = line.split("=", 1)
+    dest = parse_operand(dest)
+    rhs = rhs.strip()
+    parts = _TOKEN.findall(rhs)
+    head = parts[0]
+    if ".PARAM_" in rhs:
+        return Tripleta(Opcode.LOAD_PARAM, parse_operand(rhs), destino=dest)
+    if head == "CALL":
+        if parts[1] == "NEW":
+            # (new Tipo).metodo(...) | (new Tipo)@Padre.metodo(...)
+            tipo, rest = parts[2].split(".", 1)
+            at_type, method = split_at_type(rest)
+            return Tripleta(Opcode.CALL, MethodRef(NewObject(tipo), method, at_type), int(parts[3]), destino=dest)
+        return Tripleta(Opcode.CALL, parse_method(parts[1]), int(parts[2]), destino=dest)
+    for op in BINARY_OPS:
+        if head == op.value and len(parts) == 3:
+            return Tripleta(op, parse_operand(parts[1]), parse_operand(parts[2]), destino=dest)
+    for op in UNARY_OPS:
+        if head == op.value and len(parts) == 2:
+            return Tripleta(op, parse_operand(parts[1]), destino=dest)
+    return Tripleta(Opcode.MOVE, parse_operand(rhs), destino=dest)
+
+
+def parse_code(text):
+    code = []
+    for line in text.split('\n'):
+        triplet = parse_line(line)
+        if triplet is not None:
+            code.append(triplet)
+    return code
@@ -0,0 +1,168 @@
+from modules.Tripleta import Tripleta, Opcode, BINARY_OPS, UNARY_OPS
+from modules.Temporal import Temporal
+from modules.Operand import StackSlot, GlobalSlot, Constant, NewObject
+from modules.ControlFlowGraph import ControlFlowGraph
+
+# Operaciones donde el orden de los operandos no importa
+COMMUTATIVE = (Opcode.PLUS, Opcode.MULT, Opcode.EQ)
+
+
+class ValueTable():
+    # Estado del value numbering en un punto del codigo
+    __slots__ = ('var_vn', 'expressions', 'holders')
+
+    def __init__(self) -> None:
+        self.var_vn = {}        # temporal / sp[k] / sp_GLOBAL[k] -> numero de valor
+        self.expressions = {}   # (op, vn, vn) -> numero de valor
+        self.holders = {}       # numero de valor -> temporales que lo tuvieron
+
+    def copy(self):
+        table = ValueTable()
+        table.var_vn = dict(self.var_vn)
+        table.expressions = dict(self.expressions)
+        table.holders = {vn: list(temps) for vn, temps in self.holders.items()}
+        return table
+
+    def holder(self, vn):
+        # Un temporal que todavia tenga ese valor
+        for temp in self.holders.get(vn, []):
+            if self.var_vn.get(temp) == vn:
+                return temp
+        return None
+
+    def kill(self, kinds):
+        for var in [var for var in self.var_vn if isinstance(var, kinds)]:
+            del self.var_vn[var]
+
+
+class ValueNumbering():
+    # Value numbering por bloque que se hereda por el arbol de dominadores.
+    # Un bloque recibe la tabla de su dominador inmediato sin lo que se escribe
+    # en los caminos entre los dos. Una expresion ya calculada se cambia por una
+    # copia del temporal que la tiene, y una lectura de sp[k] o sp_GLOBAL[k]
+    # repetida por el temporal que ya la cargo. Un CALL invalida sp_GLOBAL y
+    # un NEW invalida sp y sp_GLOBAL
+    def __init__(self) -> None:
+        self.next_vn = 0
+        self.reused = 0
+
+    def run(self, body):
+        cfg = ControlFlowGraph(body)
+        if len(cfg.blocks) == 0:
+            return body
+        blocks = [block.triplets for block in cfg.blocks]
+        pending = [(0, ValueTable())]
+        while len(pending) > 0:
+            number, table = pending.pop()
+            triplets = [self.number(triplet, table) for triplet in cfg.blocks[number].triplets]
+            blocks[number] = [triplet for triplet in triplets if triplet is not None]
+            for child in cfg.dominator_children[number]:
+                pending.append((child, self.inherit(cfg, number, child, table)))
+
+        result = []
+        for triplets in blocks:
+            result.extend(triplets)
+        return result
+
+    def inherit(self, cfg, parent, child, table):
+        # Bloques por los que se puede pasar de parent a child (sin volver a parent)
+        region = set()
+        pending = list(cfg.blocks[child].predecessors)
+        while len(pending) > 0:
+            number = pending.pop()
+            if number == parent or number in region:
+                continue
+            region.add(number)
+            pending.extend(cfg.blocks[number].predecessors)
+
+        table = table.copy()
+        for number in region:
+            for triplet in cfg.blocks[number].triplets:
+                self.clobber(triplet, table)
+                written = triplet.defines()
+                if written is not None:
+                    table.var_vn.pop(written, None)
+        return table
+
+    def clobber(self, triplet, table):
+        if triplet.operador == Opcode.CALL:
+            table.kill(GlobalSlot)
+        elif triplet.operador == Opcode.ASSIGN and isinstance(triplet.direccion1, NewObject):
+            table.kill((StackSlot, GlobalSlot))
+
+    def new_vn(self):
+        self.next_vn += 1
+        return self.next_vn
+
+    def value_of(self, operand, table):
+        if isinstance(operand, Constant):
+            # La constante es una expresion mas, asi se encuentra el temporal que la tiene
+            key = ('const', type(operand.value).__name__, operand.value)
+            if key not in table.expressions:
+                table.expressions[key] = self.new_vn()
+            return table.expressions[key]
+        if isinstance(operand, (Temporal, StackSlot, GlobalSlot)):
+            if operand not in table.var_vn:
+                table.var_vn[operand] = self.new_vn()
+                self.hold(operand, table)
+            return table.var_vn[operand]
+        return None
+
+    def hold(self, var, table):
+        if isinstance(var, Temporal):
+            table.holders.setdefault(table.var_vn[var], []).append(var)
+
+    def define(self, var, vn, table):
+        table.var_vn[var] = vn
+        self.hold(var, table)
+
+    def number(self, triplet, table):
+        op = triplet.operador
+        self.clobber(triplet, table)
+
+        if op == Opcode.CALL or op == Opcode.LOAD_PARAM:
+            table.var_vn.pop(triplet.destino, None)
+            self.define(triplet.destino, self.new_vn(), table)
+            return triplet
+
+        # Las lecturas de memoria que ya estan en un temporal se cambian por el temporal
+        def use(operand):
+            if isinstance(operand, (StackSlot, GlobalSlot)):
+                temp = table.holder(self.value_of(operand, table))
+                if temp is not None:
+                    self.reused += 1
+                    return temp
+            return operand
+
+        new = triplet.map_operands(use, lambda operand: operand)
+        written = new.defines()
+
+        if op in BINARY_OPS or op in UNARY_OPS:
+            values = [self.value_of(operand, table) for operand in new.uses()]
+            if op in COMMUTATIVE:
+                values = sorted(values, key=str)
+            key = (op,) + tuple(values)
+            vn = table.expressions.get(key)
+            temp = table.holder(vn) if vn is not None else None
+            if temp is not None:
+                self.reused += 1
+                if temp == written:
+                    return None
+                new = Tripleta(Opcode.MOVE, temp, destino=written)
+            else:
+                vn = self.new_vn()
+                table.expressions[key] = vn
+            table.var_vn.pop(written, None)
+            self.define(written, vn, table)
+
+        elif op == Opcode.MOVE or op == Opcode.ASSIGN:
+            value = new.direccion1
+            if isinstance(value, NewObject):
+                vn = self.new_vn()
+            else:
+                vn = self.value_of(value, table)
+                if vn is None:
+                    vn = self.new_vn()
+            table.var_vn.pop(written, None)
+            self.define(written, vn, table)
+        return new
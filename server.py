@@ -4,6 +4,8 @@ from flask_cors import CORS
 from graphviz import Digraph
 from antlr4 import *
 from modules.AssemblerConvertor import AssemblerConvertor
+from modules.Optimizer import Optimizer
+from modules.RegisterAllocator import RegisterAllocator
 from modules.TreeDirections import TreeDirections
 from modules.ErrorListener import MyErrorListener
 from modules.Semantic import SemanticAnalyzer
@@ -89,14 +91,14 @@ def generate_images():
 
         my3D = TreeDirections(semantic_analyzer.symbol_table,treedirectionsInfoPath)
         my3D.visit(tree)
+        my3D.dump()
 
-        treedirectionsInfo = ""
-
-        with open(treedirectionsInfoPath, 'r') as file:
-            treedirectionsInfo = file.read()
+        treedirectionsInfo = my3D.getCode()
 
         assemblerInfoPath = "./output/ASS/serve.s"
-        AssemblerConvertor(treedirectionsInfo,semantic_analyzer.symbol_table,assemblerInfoPath)
+        code = Optimizer(my3D.triplets).optimize()
+        code = RegisterAllocator(code).allocate()
+        AssemblerConvertor(code,semantic_analyzer.symbol_table,assemblerInfoPath)
 
         with open(assemblerInfoPath, 'r') as file:
             assembler = file.read()
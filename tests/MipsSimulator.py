@@ -0,0 +1,213 @@
+import re
+
+# Simulador del MIPS que genera AssemblerConvertor (solo las instrucciones y
+# syscalls que usa), para correr los programas en las pruebas sin MARS/SPIM
+
+REGISTERS = ["zero", "at", "v0", "v1", "a0", "a1", "a2", "a3"] + [f"t{i}" for i in range(8)] + \
+            [f"s{i}" for i in range(8)] + ["t8", "t9", "k0", "k1", "gp", "sp", "fp", "ra"]
+
+BRANCHES = {
+    "beq": lambda x, y: x == y,
+    "bne": lambda x, y: x != y,
+    "blt": lambda x, y: x < y,
+    "bge": lambda x, y: x >= y,
+    "bgt": lambda x, y: x > y,
+    "ble": lambda x, y: x <= y,
+}
+
+
+def to_word(value):
+    # Entero de 32 bits con signo
+    value &= 0xFFFFFFFF
+    return value - (1 << 32) if value & 0x80000000 else value
+
+
+class CodeAddress():
+    # Direccion dentro de .text (lo que guardan jal, la de una funcion y las tablas virtuales)
+    __slots__ = ('index',)
+
+    def __init__(self, index) -> None:
+        self.index = index
+
+    def __eq__(self, other):
+        return isinstance(other, CodeAddress) and other.index == self.index
+
+
+class MipsSimulator():
+
+    def __init__(self, source, stdin = "", max_steps = 5_000_000) -> None:
+        self.registers = {name: 0 for name in REGISTERS}
+        self.memory = {}
+        self.labels = {}
+        self.text = []
+        self.output = []
+        self.stdin = stdin.split("\n")
+        self.heap = 0x10040000
+        self.hi = self.lo = 0
+        self.steps = 0
+        self.max_steps = max_steps
+        self.parse(source)
+
+    def parse(self, source):
+        segment = "text"
+        data = 0x10010000
+        for raw in source.split("\n"):
+            # Los comentarios empiezan con #, pero puede haber # dentro de un .asciiz
+            if '"' in raw:
+                quote = raw.rindex('"')
+                line = raw[:quote + 1] + raw[quote + 1:].split("#")[0]
+            else:
+                line = raw.split("#")[0]
+            line = line.strip()
+            if line in ("", ".data", ".text"):
+                segment = line[1:] if line else segment
+                continue
+            match = re.match(r"^([A-Za-z_][\w.]*):\s*(.*)$", line)
+            if match:
+                self.labels[match.group(1)] = data if segment == "data" else CodeAddress(len(self.text))
+                line = match.group(2).strip()
+                if not line:
+                    continue
+            if segment == "text":
+                parts = line.replace(",", " ").split()
+                self.text.append((parts[0], parts[1:]))
+            elif line.startswith(".word"):
+                for word in line[len(".word"):].split(","):
+                    self.memory[data] = word.strip()
+                    data += 4
+            elif line.startswith(".asciiz"):
+                cadena = line[line.index('"') + 1:line.rindex('"')]
+                for char in bytes(cadena, "utf-8").decode("unicode_escape"):
+                    self.memory[data] = ord(char)
+                    data += 1
+                self.memory[data] = 0
+                data = (data + 4) & ~3
+        # Las palabras de .data pueden ser etiquetas (descriptores, tablas virtuales)
+        for address, word in self.memory.items():
+            if isinstance(word, str):
+                self.memory[address] = self.labels[word] if word in self.labels else int(word)
+
+    def read(self, name):
+        return self.registers[name.lstrip("$")]
+
+    def write(self, name, value):
+        name = name.lstrip("$")
+        if name != "zero":
+            self.registers[name] = to_word(value) if isinstance(value, int) else value
+
+    def address(self, operand):
+        # offset($registro)
+        match = re.match(r"^(-?\d*)\((\$\w+)\)$", operand)
+        return self.read(match.group(2)) + int(match.group(1) or 0)
+
+    def string(self, address):
+        chars = []
+        while self.memory.get(address, 0):
+            chars.append(chr(self.memory[address]))
+            address += 1
+        return "".join(chars)
+
+    def syscall(self):
+        # Regresa False cuando el programa termina
+        service = self.registers["v0"]
+        if service == 1:
+            self.output.append(str(self.registers["a0"]))
+        elif service == 4:
+            self.output.append(self.string(self.registers["a0"]))
+        elif service == 5:
+            self.write("v0", int(self.stdin.pop(0)))
+        elif service == 9:
+            self.write("v0", self.heap)
+            self.heap += (self.registers["a0"] + 3) & ~3
+        elif service == 10:
+            return False
+        return True
+
+    def run(self):
+        # Corre desde main y regresa todo lo que imprimio el programa
+        self.registers["sp"] = 0x7fffeffc
+        pc = self.labels["main"].index
+        while pc < len(self.text):
+            op, args = self.text[pc]
+            pc += 1
+            self.steps += 1
+            if self.steps > self.max_steps:
+                raise RuntimeError("El programa no termino")
+            if op == "li":
+                self.write(args[0], int(args[1]))
+            elif op == "la":
+                self.write(args[0], self.labels[args[1]])
+            elif op == "move":
+                self.write(args[0], self.read(args[1]))
+            elif op in ("add", "addu"):
+                self.write(args[0], self.read(args[1]) + self.read(args[2]))
+            elif op in ("addi", "addiu"):
+                self.write(args[0], self.read(args[1]) + int(args[2]))
+            elif op in ("sub", "subu"):
+                self.write(args[0], self.read(args[1]) - self.read(args[2]))
+            elif op == "mul":
+                self.write(args[0], self.read(args[1]) * self.read(args[2]))
+            elif op == "mult":
+                product = self.read(args[0]) * self.read(args[1])
+                self.lo, self.hi = to_word(product), to_word(product >> 32)
+            elif op == "div":
+                x, y = self.read(args[0]), self.read(args[1])
+                # Division entera truncada hacia cero, como MIPS
+                quotient = abs(x) // abs(y) * (1 if (x >= 0) == (y >= 0) else -1)
+                self.lo, self.hi = to_word(quotient), to_word(x - quotient * y)
+            elif op == "mflo":
+                self.write(args[0], self.lo)
+            elif op == "mfhi":
+                self.write(args[0], self.hi)
+            elif op == "sll":
+                self.write(args[0], self.read(args[1]) << int(args[2]))
+            elif op == "sra":
+                self.write(args[0], self.read(args[1]) >> int(args[2]))
+            elif op == "srl":
+                self.write(args[0], (self.read(args[1]) & 0xFFFFFFFF) >> int(args[2]))
+            elif op == "slt":
+                self.write(args[0], int(self.read(args[1]) < self.read(args[2])))
+            elif op == "slti":
+                self.write(args[0], int(self.read(args[1]) < int(args[2])))
+            elif op == "sle":
+                self.write(args[0], int(self.read(args[1]) <= self.read(args[2])))
+            elif op == "seq":
+                self.write(args[0], int(self.read(args[1]) == self.read(args[2])))
+            elif op == "sne":
+                self.write(args[0], int(self.read(args[1]) != self.read(args[2])))
+            elif op == "xori":
+                self.write(args[0], self.read(args[1]) ^ int(args[2]))
+            elif op == "andi":
+                self.write(args[0], self.read(args[1]) & int(args[2]))
+            elif op == "lw":
+                self.write(args[0], self.memory.get(self.address(args[1]), 0))
+            elif op == "sw":
+                self.memory[self.address(args[1])] = self.read(args[0])
+            elif op == "lb":
+                value = self.memory.get(self.address(args[1]), 0)
+                self.write(args[0], value if isinstance(value, int) else 0)
+            elif op == "sb":
+                self.memory[self.address(args[1])] = self.read(args[0]) & 0xFF
+            elif op in BRANCHES:
+                right = self.read(args[1]) if args[1].startswith("$") else int(args[1])
+                if BRANCHES[op](self.read(args[0]), right):
+                    pc = self.labels[args[2]].index
+            elif op in ("beqz", "bnez"):
+                if (self.read(args[0]) == 0) == (op == "beqz"):
+                    pc = self.labels[args[1]].index
+            elif op in ("j", "b"):
+                pc = self.labels[args[0]].index
+            elif op == "jal":
+                self.registers["ra"] = CodeAddress(pc)
+                pc = self.labels[args[0]].index
+            elif op == "jalr":
+                self.registers["ra"] = CodeAddress(pc)
+                pc = self.read(args[0]).index
+            elif op == "jr":
+                pc = self.read(args[0]).index
+            elif op == "syscall":
+                if not self.syscall():
+                    break
+            else:
+                raise RuntimeError(f"Instruccion no soportada: {op} {' '.join(args)}")
+        return "".join(self.output)
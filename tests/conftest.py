@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Las pruebas importan modules/ y yapl/ desde la raiz del repo
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
@@ -0,0 +1,62 @@
+import os
+import pytest
+
+# El lexer y el parser se generan con ANTLR desde g4/ (yapl/ no esta en el repo)
+pytest.importorskip("antlr4")
+pytest.importorskip("yapl.YAPLParser")
+
+from antlr4 import InputStream, CommonTokenStream
+from yapl.YAPLLexer import YAPLLexer
+from yapl.YAPLParser import YAPLParser
+from modules.ErrorListener import MyErrorListener
+from modules.Semantic import SemanticAnalyzer
+from modules.TreeDirections import TreeDirections
+from modules.Optimizer import Optimizer
+from modules.RegisterAllocator import RegisterAllocator
+from modules.GraphColoringAllocator import GraphColoringAllocator
+from modules.AssemblerConvertor import AssemblerConvertor
+from MipsSimulator import MipsSimulator
+
+INPUTS = os.path.join(os.path.dirname(__file__), "..", "inputs")
+# Lo que leen los programas con in_int
+STDIN = "\n".join(str(number) for number in range(7, 40)) + "\n"
+
+
+def compile_program(source, level, output):
+    # Mismo camino que main.py; None si el programa tiene errores
+    lexer = YAPLLexer(InputStream(source))
+    listener = MyErrorListener()
+    lexer.removeErrorListeners()
+    lexer.addErrorListener(listener)
+    parser = YAPLParser(CommonTokenStream(lexer))
+    parser.removeErrorListeners()
+    parser.addErrorListener(listener)
+    tree = parser.program()
+    semantic_analyzer = SemanticAnalyzer()
+    semantic_analyzer.visit(tree)
+    if len(semantic_analyzer.ErrorList) > 0 or len(listener.ErrorList) > 0:
+        return None
+
+    my3D = TreeDirections(semantic_analyzer.symbol_table, os.path.join(output, "3D.txt"))
+    my3D.visit(tree)
+    code = Optimizer(my3D.triplets, level).optimize()
+    allocator = GraphColoringAllocator(code) if level >= 2 else RegisterAllocator(code)
+    assembler = os.path.join(output, f"O{level}.s")
+    AssemblerConvertor(allocator.allocate(), semantic_analyzer.symbol_table, assembler)
+    with open(assembler) as file:
+        return file.read()
+
+
+@pytest.mark.parametrize("name", sorted(name for name in os.listdir(INPUTS) if name.endswith(".txt")))
+def test_same_output_at_every_level(name, tmp_path):
+    # -O1 y -O2 no pueden cambiar lo que imprime el programa
+    with open(os.path.join(INPUTS, name), encoding = "utf-8") as file:
+        source = file.read()
+    outputs = {}
+    for level in (0, 1, 2):
+        assembler = compile_program(source, level, str(tmp_path))
+        if assembler is None:
+            pytest.skip(f"{name} tiene errores")
+        outputs[level] = MipsSimulator(assembler, STDIN).run()
+    assert outputs[1] == outputs[0]
+    assert outputs[2] == outputs[0]